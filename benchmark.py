@@ -0,0 +1,173 @@
+"""Benchmark of training and generation, for comparing performance between commits."""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from project.cumulative_probability_table import CumulativeProbabilityTable
+from project.ngram_cumulative_strategy import NGramCumulativeStrategy
+from project.ngram_length_strategy import NGramLengthStrategy
+from project.random_name_generator import RandomNameGenerator
+from project.util.data_loader import ChunkedFileDataLoader
+
+# Synthetic corpora are written to the media directory, where generators read sample data from
+CORPUS_PREFIX = '_benchmark_'
+
+PARSER = argparse.ArgumentParser(description='Random Name Generator benchmark')
+PARSER.add_argument('--output', default='benchmark.json',
+                    help='The JSON file to write the results to. Defaults to benchmark.json.')
+PARSER.add_argument('--sizes', type=int, nargs='+', default=[1 << 16, 1 << 18, 1 << 20, 1 << 22],
+                    help='The sizes in bytes of the synthetic corpora.')
+PARSER.add_argument('-o', '--order', type=int, default=2,
+                    help='The order of the trained models. Defaults to 2.')
+PARSER.add_argument('--names', type=int, default=20000,
+                    help='The number of names generated per corpus. Defaults to 20000.')
+PARSER.add_argument('--repeat', type=int, default=3,
+                    help='The number of runs of every measure, the best one being kept. '
+                         'Defaults to 3.')
+PARSER.add_argument('--seed', type=int, default=0,
+                    help='Seed of the synthetic corpora and of the generators. Defaults to 0.')
+
+def build_corpus(names, size, seed):
+    """
+    Return synthetic sample data of about size bytes, made of names spliced from the beginning
+    of a name and the end of another one so that larger corpora also hold more n-grams.
+
+    Parameters
+    ----------
+    names: list
+           The names of the sample data files.
+    size: int
+          Size of the corpus in bytes.
+    seed: int
+          Seed of the random splicing.
+    """
+    splicer = random.Random(seed)
+    corpus = list()
+    length = 0
+    while length < size:
+        first, second = splicer.choice(names), splicer.choice(names)
+        name = first[:splicer.randint(1, len(first))] + second[splicer.randint(0, len(second) - 1):]
+        corpus.append(name)
+        length += len(name.encode('utf-8')) + 1
+    return ' '.join(corpus)
+
+def best_time(function, repeat):
+    """
+    Return the shortest time in seconds taken by function over repeat runs.
+    """
+    timings = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def load_table(data_file, order):
+    """
+    Train and return a probability table of the given order from a sample data file.
+    """
+    table = CumulativeProbabilityTable(NGramLengthStrategy(order), NGramCumulativeStrategy(),
+                                       ChunkedFileDataLoader())
+    table.load(data_file)
+    return table
+
+def peak_memory(function):
+    """
+    Return the peak size in bytes of the memory allocated by Python while running function.
+    """
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def benchmark_corpus(corpus_name, args):
+    """
+    Return the measures of training a model on a corpus and generating names from it.
+    """
+    data_file = 'media/' + corpus_name + '.txt'
+    table = load_table(data_file, args.order)
+    generator = RandomNameGenerator({'file': corpus_name, 'order': args.order, 'cache': False,
+                                     'seed': args.seed})
+
+    def generate():
+        for _ in range(args.names):
+            generator.generate()
+
+    generate_seconds = best_time(generate, args.repeat)
+    return {
+        'corpus_bytes': os.path.getsize(data_file),
+        'table_keys': len(table.frequencies),
+        'load_seconds': best_time(lambda: load_table(data_file, args.order), args.repeat),
+        'load_peak_memory_bytes': peak_memory(lambda: load_table(data_file, args.order)),
+        'names_per_second': args.names / generate_seconds,
+        'seconds_per_name': generate_seconds / args.names,
+    }
+
+def benchmark_startup(args):
+    """
+    Return the time in seconds taken by rng.py to generate a single name, its compiled model
+    being already cached.
+    """
+    command = [sys.executable, 'rng.py', '1', '-o', str(args.order)]
+    subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+    return best_time(lambda: subprocess.run(command, stdout=subprocess.DEVNULL, check=True),
+                     args.repeat)
+
+def git_revision():
+    """
+    Return the commit of the working tree, or None outside of a git repository.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, check=True,
+                              text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    """
+    Run the benchmark and write its results.
+    """
+    args = PARSER.parse_args()
+    names = list()
+    for data_file in sorted(glob.glob('media/*.txt')):
+        if not os.path.basename(data_file).startswith(CORPUS_PREFIX):
+            names.extend(ChunkedFileDataLoader().iter_names(data_file))
+
+    corpora = list()
+    for size in sorted(args.sizes):
+        corpus_name = '%s%d' % (CORPUS_PREFIX, size)
+        with open('media/' + corpus_name + '.txt', 'w', encoding='utf-8') as f:
+            f.write(build_corpus(names, size, args.seed))
+        try:
+            measures = benchmark_corpus(corpus_name, args)
+        finally:
+            os.remove('media/' + corpus_name + '.txt')
+        print('%(corpus_bytes)10d bytes %(table_keys)8d keys %(load_seconds)8.3fs load '
+              '%(names_per_second)10.0f names/s' % measures, file=sys.stderr)
+        corpora.append(measures)
+
+    results = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'parameters': {'order': args.order, 'names': args.names, 'repeat': args.repeat,
+                       'seed': args.seed},
+        'corpora': corpora,
+        'startup_seconds': benchmark_startup(args),
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+# Identify this module as main
+if __name__ == "__main__":
+    main()
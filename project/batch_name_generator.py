@@ -0,0 +1,434 @@
+"""This module contains a vectorized engine generating random names in large batches."""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from project.name_filter import NameFilter
+
+# Distance between two rows of a flattened cumulative table. Cumulative values lie between -1.0
+# (padding for missing leading successors) and a little over 1.0, so adding a multiple of
+# ROW_OFFSET to each row keeps the whole flattened table sorted.
+ROW_OFFSET = 4.0
+
+class BatchNameGenerator:
+    """
+    Generates random names in batches with NumPy. The transition indexes of a trained
+    RandomNameGenerator are compiled into arrays indexed by character codes, and all the names
+    of a batch are advanced together one letter position at a time, following the same rules
+    as RandomNameGenerator. Requires NumPy.
+    """
+
+    batch_size = 100000
+    stats = None
+    _alphabet = None
+    _codes = None
+    _capitals = None
+    _lowercase = None
+    _space = None
+    _regular_table = None
+    _word_ending_table = None
+    _closing_table = None
+    _starting_row = None
+    _name_length_distribution = None
+    _random = None
+    _known_names = None
+
+    def __init__(self, name_generator, seed=None):
+        """
+        Parameters
+        ----------
+        name_generator: RandomNameGenerator
+                        A generator whose probability table is already loaded.
+        seed: int
+              Seed of the random number generator, or None to seed from the operating system.
+        """
+        if numpy is None:
+            raise ImportError('BatchNameGenerator requires NumPy')
+        if name_generator.is_constrained():
+            raise ValueError('BatchNameGenerator does not support length, prefix or suffix '
+                             'constraints')
+        regular_index = name_generator.ngram_pr_table.indexes['regular']
+        word_ending_index = name_generator.ngram_pr_table.indexes['word_ending']
+        ending_letters = {context for context in word_ending_index.contexts()
+                          if len(context) == 1}
+        closing_index = regular_index.restrict(ending_letters)
+
+        # Map every character of the sample data to a small integer code
+        alphabet = {' '}
+        max_context_length = 0
+        for index in (regular_index, word_ending_index):
+            for context, (successors, _) in index.items():
+                alphabet.update(context)
+                alphabet.update(successors)
+                max_context_length = max(max_context_length, len(context))
+        # Context codes are the letters of a context read as a number packed in 64 bits
+        if len(alphabet) ** max_context_length >= 1 << 63:
+            raise ValueError('BatchNameGenerator does not support %d letter contexts over %d '
+                             'characters' % (max_context_length, len(alphabet)))
+        self._alphabet = sorted(alphabet)
+        self._codes = {char: code for (code, char) in enumerate(self._alphabet)}
+        self._space = self._codes[' ']
+        # Unicode code points of the letters, capitalized when they start a name
+        self._capitals = numpy.array(
+            [ord(self._capitalize(char)) for char in self._alphabet], dtype=numpy.uint32)
+        self._lowercase = numpy.array([ord(char) for char in self._alphabet], dtype=numpy.uint32)
+
+        self._regular_table = self._compile(regular_index)
+        self._word_ending_table = self._compile(word_ending_index)
+        self._closing_table = self._compile(closing_index)
+        self._starting_row = numpy.searchsorted(self._regular_table[1][0], self._space)
+        self._name_length_distribution = numpy.array(name_generator.name_length_distribution)
+        self._random = numpy.random.default_rng(seed)
+        self._known_names = name_generator.known_names
+        self.stats = name_generator.stats
+
+    def seed(self, seed):
+        """
+        Reset the random number generator of this generator, so that the same names are
+        generated again for the same seed.
+        Parameters
+        ----------
+        seed: int
+              The new seed, or None to seed from the operating system.
+        """
+        self._random = numpy.random.default_rng(seed)
+
+    def known_names(self):
+        """
+        Return the lowercase names of the sample data, see RandomNameGenerator.known_names.
+        """
+        return self._known_names()
+
+    def generate(self):
+        """
+        Generate and return a new random name.
+        """
+        return self.generate_many(1)[0]
+
+    def generate_many(self, count, unique=False, novel=False):
+        """
+        Generate and return a new list of random names.
+        Parameters
+        ----------
+        count: int
+               Number of names to generate.
+        unique: bool
+                Whether to never generate the same name twice.
+        novel: bool
+               Whether to never generate a name of the sample data.
+        """
+        return list(self.iter_names(count, unique, novel))
+
+    def iter_names(self, count=None, unique=False, novel=False):
+        """
+        Lazily generate random names, one batch at a time. NameSpaceExhaustedError is raised
+        when unique or novel names run out.
+        Parameters
+        ----------
+        count: int
+               Number of names to generate. Names are generated indefinitely if None.
+        unique: bool
+                Whether to never generate the same name twice.
+        novel: bool
+               Whether to never generate a name of the sample data.
+        """
+        size = self.batch_size if count is None else min(count, self.batch_size)
+        if unique or novel:
+            # Filtered out names are replaced by the following batches
+            name_filter = NameFilter(unique, self.known_names() if novel else None)
+            return name_filter.apply(self._iter_generated(None, size), count)
+        return self._iter_generated(count, size)
+
+    def _iter_generated(self, count, size):
+        """
+        Lazily generate count random names in batches of size names, or names indefinitely if
+        count is None.
+        """
+        while count is None or count > 0:
+            if count is not None:
+                size = min(count, size)
+                count -= size
+            yield from self.generate_batch(size)
+
+    def generate_batch(self, size):
+        """
+        Generate a batch of random names and return them as a list.
+        Parameters
+        ----------
+        size: int
+              Number of names in the batch.
+        """
+        desired_lengths = self._random.choice(self._name_length_distribution, size)
+        # A name holds a space, its starting letter, desired_length - 1 next letters and up to
+        # two last letters. Unused positions are left to -1
+        letters = numpy.full((size, desired_lengths.max() + 3), -1, dtype=numpy.intp)
+        letters[:, 0] = self._space
+        letters[:, 1] = self._get_starting_letters(size)
+        everyone = numpy.arange(size)
+        for position in range(2, desired_lengths.max() + 1):
+            active = everyone[desired_lengths >= position]
+            letters[active, position] = self._get_next_letters(
+                letters[active], numpy.full(len(active), position))
+        self._set_last_letters(letters, desired_lengths + 1)
+        if self.stats is not None:
+            self.stats.count('names', size)
+            name_lengths = numpy.bincount(numpy.count_nonzero(letters[:, 1:] >= 0, axis=1))
+            for length in numpy.flatnonzero(name_lengths):
+                self.stats.count('name_length.%d' % length, int(name_lengths[length]))
+        return self._decode(letters[:, 1:])
+
+    def score_many(self, names):
+        """
+        Return the log-probability of each name under the model as an array, scoring all the
+        names of a batch together, see RandomNameGenerator.score_many.
+        Parameters
+        ----------
+        names: list
+               The names to score.
+        """
+        names = list(names)
+        scores = numpy.empty(len(names))
+        for start in range(0, len(names), self.batch_size):
+            scores[start:start + self.batch_size] = self._score_batch(
+                names[start:start + self.batch_size])
+        return scores
+
+    def _score_batch(self, names):
+        """
+        Return the log-probability of each name of a batch as an array.
+        """
+        names = [name.lower() for name in names]
+        lengths = numpy.array([len(name) for name in names], dtype=numpy.intp)
+        # Look up the code of every character of every name at once
+        code_points = numpy.frombuffer(''.join(names).encode('utf-32-le'), dtype=numpy.uint32)
+        alphabet_points = numpy.array([ord(char) for char in self._alphabet], dtype=numpy.uint32)
+        codes = numpy.minimum(numpy.searchsorted(alphabet_points, code_points),
+                              len(alphabet_points) - 1)
+        known = alphabet_points[codes] == code_points
+        rows = numpy.repeat(numpy.arange(len(names)), lengths)
+        columns = numpy.arange(len(code_points)) - numpy.repeat(numpy.cumsum(lengths) - lengths,
+                                                                lengths) + 1
+        letters = numpy.full((len(names), lengths.max(initial=0) + 1), -1, dtype=numpy.intp)
+        letters[:, 0] = self._space
+        letters[rows, columns] = codes
+        # Letters missing from the alphabet never follow any context
+        unknown = numpy.zeros(len(names), dtype=bool)
+        unknown[rows[~known]] = True
+
+        scores = numpy.where(unknown, -numpy.inf, 0.0)
+        everyone = numpy.arange(len(names))
+        for position in range(1, letters.shape[1]):
+            active = everyone[lengths >= position]
+            ends = numpy.full(len(active), position)
+            last = lengths[active] == position
+            # Letters before the last one follow the longest regular context
+            found = numpy.zeros(len(active), dtype=bool)
+            log_probabilities = numpy.empty(len(active))
+            # The last letter follows the longest word ending context, then the longest context
+            # of a letter that can end a name
+            candidates = [(self._word_ending_table, last), (self._closing_table, last),
+                          (self._regular_table, numpy.ones(len(active), dtype=bool))]
+            for table, allowed in candidates:
+                pending = ~found & allowed
+                if not pending.any():
+                    continue
+                context_lengths, rows = self._find_longest(table, letters[active[pending]],
+                                                           ends[pending])
+                pending_rows = numpy.flatnonzero(pending)
+                next_letters = letters[active[pending], position]
+                for length, (_, _, _, table_log_probabilities) in table.items():
+                    matching = context_lengths == length
+                    log_probabilities[pending_rows[matching]] = table_log_probabilities[
+                        rows[matching], next_letters[matching]]
+                found[pending_rows[context_lengths > 0]] = True
+            # Letters without any context follow the starting letters
+            missing = ~found
+            log_probabilities[missing] = self._regular_table[1][3][
+                self._starting_row, letters[active[missing], position]]
+            scores[active] += log_probabilities
+        return scores
+
+    def _get_starting_letters(self, size):
+        """
+        Return the starting letters of size new random names.
+        """
+        return self._sample(self._regular_table[1],
+                            numpy.full(size, self._starting_row, dtype=numpy.intp))
+
+    def _get_next_letters(self, letters, ends):
+        """
+        Return the next letters of names based on the longest context they end with, or new
+        random letters when there is none.
+        Parameters
+        ----------
+        letters: numpy.ndarray
+                 Letter codes of the names, one name per row.
+        ends: numpy.ndarray
+              Number of letters of each name.
+        """
+        next_letters = numpy.empty(len(letters), dtype=numpy.intp)
+        lengths, rows = self._find_longest(self._regular_table, letters, ends)
+        if self.stats is not None:
+            self._count_lengths('next_letter.context_length.%d', lengths)
+            self._count('next_letter.random_letter', numpy.count_nonzero(lengths == 0))
+        for length, table in self._regular_table.items():
+            matching = lengths == length
+            next_letters[matching] = self._sample(table, rows[matching])
+        # Generate random letters
+        missing = lengths == 0
+        next_letters[missing] = self._get_starting_letters(numpy.count_nonzero(missing))
+        return next_letters
+
+    def _set_last_letters(self, letters, ends):
+        """
+        Write the last letter (or two last letters) of every name of the batch after its end,
+        following the word ending rules of RandomNameGenerator._get_last_letter.
+        """
+        everyone = numpy.arange(len(letters))
+        ending_lengths, ending_rows = self._find_longest(self._word_ending_table, letters, ends)
+        closing_lengths, closing_rows = self._find_longest(self._closing_table, letters, ends)
+        closing_lengths[ending_lengths > 0] = 0
+        if self.stats is not None:
+            # Names needing one more letter get it like a recursive call would
+            closing_count = int(numpy.count_nonzero(closing_lengths))
+            self._count_lengths('last_letter.word_ending.context_length.%d', ending_lengths)
+            self._count_lengths('last_letter.closing.context_length.%d', closing_lengths)
+            self._count('last_letter.next_letter',
+                        numpy.count_nonzero((ending_lengths == 0) & (closing_lengths == 0)))
+            self._count('last_letter.recursion_depth.0', len(letters) - closing_count)
+            self._count('last_letter.recursion_depth.1', closing_count)
+
+        # Names ending with an n-gram ending with a space
+        for length, table in self._word_ending_table.items():
+            matching = everyone[ending_lengths == length]
+            letters[matching, ends[matching]] = self._sample(table, ending_rows[matching])
+        # Names needing one more letter before an n-gram ending with a space
+        for length, table in self._closing_table.items():
+            matching = everyone[closing_lengths == length]
+            letters[matching, ends[matching]] = self._sample(table, closing_rows[matching])
+        closing = everyone[closing_lengths > 0]
+        lengths, rows = self._find_longest(self._word_ending_table, letters[closing],
+                                           ends[closing] + 1)
+        if self.stats is not None:
+            self._count_lengths('last_letter.word_ending.context_length.%d', lengths)
+        for length, table in self._word_ending_table.items():
+            matching = lengths == length
+            letters[closing[matching], ends[closing[matching]] + 1] = self._sample(
+                table, rows[matching])
+        # Everything else ends with a regular next letter
+        other = everyone[(ending_lengths == 0) & (closing_lengths == 0)]
+        letters[other, ends[other]] = self._get_next_letters(letters[other], ends[other])
+
+    def _find_longest(self, table, letters, ends):
+        """
+        Return the length of the longest context of the compiled table that each name ends
+        with (0 when there is none) and the row of that context in the table.
+        """
+        alphabet_size = len(self._alphabet)
+        everyone = numpy.arange(len(letters))
+        lengths = numpy.zeros(len(letters), dtype=numpy.intp)
+        rows = numpy.zeros(len(letters), dtype=numpy.intp)
+        context_codes = numpy.zeros(len(letters), dtype=numpy.int64)
+        valid = numpy.ones(len(letters), dtype=bool)
+        for length in range(1, max(table, default=0) + 1):
+            positions = ends - length
+            valid &= positions >= 0
+            if not valid.any():
+                break
+            context_letters = letters[everyone, numpy.maximum(positions, 0)]
+            context_codes += context_letters * alphabet_size ** (length - 1)
+            if length not in table:
+                continue
+            codes = table[length][0]
+            found = numpy.minimum(numpy.searchsorted(codes, context_codes), len(codes) - 1)
+            matching = valid & (codes[found] == context_codes)
+            lengths[matching] = length
+            rows[matching] = found[matching]
+        return lengths, rows
+
+    def _count(self, event, amount):
+        """
+        Count an event that happened amount times, if it happened at all.
+        """
+        if amount:
+            self.stats.count(event, int(amount))
+
+    def _count_lengths(self, event, lengths):
+        """
+        Count an event for every nonzero context length, the event name being formatted with
+        the length.
+        """
+        counts = numpy.bincount(lengths)
+        for length in numpy.flatnonzero(counts[1:]) + 1:
+            self._count(event % length, counts[length])
+
+    def _sample(self, table, rows):
+        """
+        Return one successor for each of the given rows of a compiled table.
+        """
+        _, cumulative_values, last_successors, _ = table
+        alphabet_size = len(self._alphabet)
+        random_numbers = self._random.random(len(rows))
+        positions = numpy.searchsorted(
+            cumulative_values, random_numbers + rows * ROW_OFFSET, side='left')
+        return numpy.minimum(positions - rows * alphabet_size, last_successors[rows])
+
+    def _compile(self, index):
+        """
+        Compile the contexts of a transition index into arrays, grouped by context length.
+        A context code is the codes of its letters read as a number in base alphabet size, the
+        last letter being the least significant digit.
+        Returns a dictionary of context length to the sorted context codes of that length, the
+        flattened cumulative values of every letter of the alphabet after each context (offset
+        by ROW_OFFSET per row), the code of the last successor of each context and the
+        log-probability of every letter of the alphabet after each context.
+        """
+        alphabet_size = len(self._alphabet)
+        contexts_by_length = dict()
+        for context, (successors, values) in index.items():
+            if context:
+                code = 0
+                for char in context:
+                    code = code * alphabet_size + self._codes[char]
+                contexts_by_length.setdefault(len(context), []).append((code, successors, values))
+
+        table = dict()
+        for length, contexts in contexts_by_length.items():
+            contexts.sort(key=lambda context: context[0])
+            cumulative_values = numpy.full((len(contexts), alphabet_size), -1.0)
+            last_successors = numpy.zeros(len(contexts), dtype=numpy.intp)
+            for row, (_, successors, values) in enumerate(contexts):
+                columns = [self._codes[successor] for successor in successors]
+                cumulative_values[row, columns] = values
+                last_successors[row] = columns[-1]
+            # Missing successors take the cumulative value of the previous successor so that a
+            # binary search never lands on them
+            cumulative_values = numpy.maximum.accumulate(cumulative_values, axis=1)
+            # Probabilities are the differences between consecutive cumulative values
+            probabilities = numpy.diff(numpy.maximum(cumulative_values, 0.0), axis=1, prepend=0.0)
+            with numpy.errstate(divide='ignore'):
+                log_probabilities = numpy.where(probabilities > 0, numpy.log(probabilities),
+                                                -numpy.inf)
+            cumulative_values += numpy.arange(len(contexts))[:, None] * ROW_OFFSET
+            codes = numpy.array([code for (code, _, _) in contexts], dtype=numpy.int64)
+            table[length] = (codes, cumulative_values.ravel(), last_successors,
+                             log_probabilities)
+        return table
+
+    def _decode(self, letters):
+        """
+        Turn a matrix of letter codes (padded with -1) into a list of capitalized names.
+        """
+        code_points = numpy.where(letters >= 0, self._lowercase[letters], 0).astype(numpy.uint32)
+        code_points[:, 0] = self._capitals[letters[:, 0]]
+        width = letters.shape[1]
+        return code_points.view('<U%d' % width).ravel().tolist()
+
+    @staticmethod
+    def _capitalize(char):
+        """
+        Return the capitalized form of char if it is a single character, otherwise char.
+        """
+        capital = char.capitalize()
+        return capital if len(capital) == 1 else char
@@ -0,0 +1,218 @@
+"""Module for CompactTransitionIndex."""
+
+import mmap
+from array import array
+from bisect import bisect_left
+from project.transition_index import TransitionIndex
+
+# Names and type codes of the arrays of a compact transition index, in the order they are stored
+ARRAYS = (('child_offsets', 'I'), ('child_letters', 'I'), ('successor_offsets', 'I'),
+          ('successor_letters', 'I'), ('cumulative_values', 'd'))
+
+class CompactContext:
+    """
+    A context of a compact transition index, holding views of its successors and their
+    cumulative probabilities in the arrays of the index.
+    """
+
+    __slots__ = ('depth', 'successors', 'cumulative_values')
+
+    def __init__(self, depth, successors, cumulative_values):
+        self.depth = depth
+        self.successors = successors
+        self.cumulative_values = cumulative_values
+
+    def sample(self, random_number):
+        """
+        Return the first successor whose cumulative probability is at least random_number.
+
+        Parameters
+        ----------
+        random_number: float
+                       A number between 0 and 1.
+        """
+        position = bisect_left(self.cumulative_values, random_number)
+        # Cumulative values are rounded off, so the last one may fall just short of 1.0
+        if position == len(self.successors):
+            position -= 1
+        return self.successors[position]
+
+class CompactTransitionIndex(TransitionIndex):
+    """
+    Read-only transition index stored in a few flat arrays instead of one object per context,
+    taking several times less memory than TransitionIndex for a slightly slower lookup.
+
+    The nodes of the trie are numbered breadth first from the root, with the children of a node
+    sorted by letter, so that node n + 1 is reached by edge n. The edges from node n are
+    child_offsets[n] to child_offsets[n + 1], each labelled with the code point of its letter in
+    child_letters. The successors of node n are successor_offsets[n] to successor_offsets[n + 1]
+    in successor_letters and cumulative_values.
+
+    The arrays may be views of a memory-mapped compiled model. Pickling such an index only sends
+    the location of its arrays, so that every process maps the same memory instead of holding a
+    copy of the index.
+    """
+
+    _arrays = None
+    _successors = None
+    _location = None
+
+    def __init__(self, arrays, location=None):
+        """
+        Parameters
+        ----------
+        arrays: tuple
+                The arrays of the index, in the order of ARRAYS.
+        location: tuple
+                  Path of the compiled model holding the arrays and the position and length of
+                  each array in it, or None when the arrays are not read from a file.
+        """
+        # Not calling the constructor of TransitionIndex, there is no trie of nodes
+        self._arrays = tuple(arrays)
+        self._location = location
+        successor_offsets = self._arrays[2]
+        self._successors = ''.join(map(chr, self._arrays[3]))
+        self._size = sum(1 for node in range(len(successor_offsets) - 1)
+                         if successor_offsets[node] != successor_offsets[node + 1])
+
+    def __reduce__(self):
+        if self._location is not None:
+            return _map_index, self._location
+        arrays = tuple(array(typecode, values) for ((_, typecode), values)
+                       in zip(ARRAYS, self._arrays))
+        return CompactTransitionIndex, (arrays,)
+
+    @classmethod
+    def from_index(cls, index):
+        """
+        Build a compact index holding the same contexts as another transition index.
+
+        Parameters
+        ----------
+        index: TransitionIndex
+               The index to copy.
+        """
+        successors_by_context = dict(index.items())
+        # Every suffix of a context is a node of the trie. Sorting the nodes by length, then by
+        # their letters read backwards, numbers them breadth first with sorted children
+        contexts = {''}
+        for context in successors_by_context:
+            contexts.update(context[position:] for position in range(len(context)))
+        contexts = sorted(contexts, key=lambda context: (len(context), context[::-1]))
+        nodes = {context: node for (node, context) in enumerate(contexts)}
+
+        child_offsets = array('I', [0] * (len(contexts) + 1))
+        child_letters = array('I')
+        successor_offsets = array('I', [0])
+        successor_letters = array('I')
+        cumulative_values = array('d')
+        for context in contexts[1:]:
+            child_offsets[nodes[context[1:]] + 1] += 1
+            child_letters.append(ord(context[0]))
+        for node in range(len(contexts)):
+            child_offsets[node + 1] += child_offsets[node]
+        for context in contexts:
+            successors, values = successors_by_context.get(context, ((), ()))
+            successor_letters.extend(map(ord, successors))
+            cumulative_values.extend(values)
+            successor_offsets.append(len(successor_letters))
+        return cls((child_offsets, child_letters, successor_offsets, successor_letters,
+                    cumulative_values))
+
+    def arrays(self):
+        """
+        Return the arrays of the index, in the order of ARRAYS.
+        """
+        return self._arrays
+
+    def items(self):
+        """
+        Return all the contexts along with their successors and cumulative probabilities.
+        """
+        child_offsets, child_letters, successor_offsets, _, cumulative_values = self._arrays
+        contexts = ['']
+        for node in range(len(successor_offsets) - 1):
+            context = contexts[node]
+            contexts.extend(chr(child_letters[edge]) + context
+                            for edge in range(child_offsets[node], child_offsets[node + 1]))
+            start, end = successor_offsets[node], successor_offsets[node + 1]
+            if start != end:
+                yield context, (self._successors[start:end], cumulative_values[start:end])
+
+    def add(self, context, successor, cumulative_value):
+        raise TypeError('CompactTransitionIndex is read-only')
+
+    def set(self, context, successors, cumulative_values):
+        raise TypeError('CompactTransitionIndex is read-only')
+
+    def find_longest(self, letters):
+        """
+        Return the longest context with successors that the letters end with, or None when not
+        even the last letter is such a context. The empty context is never returned.
+
+        Parameters
+        ----------
+        letters: sequence
+                 The letters read so far.
+        """
+        child_offsets, child_letters, successor_offsets, _, _ = self._arrays
+        node = 0
+        longest = None
+        longest_depth = 0
+        for depth in range(1, len(letters) + 1):
+            code = ord(letters[-depth])
+            end = child_offsets[node + 1]
+            edge = bisect_left(child_letters, code, child_offsets[node], end)
+            if edge == end or child_letters[edge] != code:
+                break
+            node = edge + 1
+            if successor_offsets[node] != successor_offsets[node + 1]:
+                longest = node
+                longest_depth = depth
+        if longest is None:
+            return None
+        return self._context(longest, longest_depth)
+
+    def restrict(self, letters):
+        """
+        Return a new compact index only keeping the successors contained in letters, see
+        TransitionIndex.restrict.
+        """
+        return CompactTransitionIndex.from_index(super().restrict(letters))
+
+    def _find(self, context):
+        """
+        Return the context, or None if the context is not in the trie.
+        """
+        child_offsets, child_letters, _, _, _ = self._arrays
+        node = 0
+        for depth in range(1, len(context) + 1):
+            code = ord(context[-depth])
+            end = child_offsets[node + 1]
+            edge = bisect_left(child_letters, code, child_offsets[node], end)
+            if edge == end or child_letters[edge] != code:
+                return None
+            node = edge + 1
+        return self._context(node, len(context))
+
+    def _context(self, node, depth):
+        """
+        Return a view of the successors of a node.
+        """
+        successor_offsets = self._arrays[2]
+        start, end = successor_offsets[node], successor_offsets[node + 1]
+        if start == end:
+            return CompactContext(depth, None, None)
+        return CompactContext(depth, self._successors[start:end],
+                              self._arrays[4][start:end])
+
+def _map_index(model_file, positions):
+    """
+    Return the compact index whose arrays are found at the given positions of a compiled model,
+    mapping the file in memory.
+    """
+    with open(model_file, 'rb') as f:
+        data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    arrays = tuple(data[position:position + size].cast(typecode)
+                   for ((_, typecode), (position, size)) in zip(ARRAYS, positions))
+    return CompactTransitionIndex(arrays, (model_file, positions))
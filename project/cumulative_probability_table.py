@@ -1,6 +1,11 @@
 """Module for CumulativeProbabilityTable. Extends ProbabilityTable."""
 
+from collections import defaultdict
+from project.compact_transition_index import CompactTransitionIndex
 from project.probability_table import ProbabilityTable
+from project.transition_index import TransitionIndex
+from project.util.compact_mappings import CompactCounts, CompactFrequencies
+from project.util.stats import timed
 
 class CumulativeProbabilityTable(ProbabilityTable):
     """
@@ -9,11 +14,93 @@ class CumulativeProbabilityTable(ProbabilityTable):
     """
 
     cumulative_strategy = None
+    indexes = None
 
     def __init__(self, letter_length_strategy, cumulative_strategy, input_loader):
         super().__init__(letter_length_strategy, input_loader)
         self.cumulative_strategy = cumulative_strategy
 
-    def load(self, data_name):
-        super().load(data_name)
-        self.cumulative_strategy.execute(self.frequencies)
+    def load(self, data_name, processes=1, digest=None, chunk_consumers=()):
+        super().load(data_name, processes, digest, chunk_consumers)
+        with timed(self.stats, 'cumulate'):
+            self.cumulative_strategy.execute(self.frequencies)
+        with timed(self.stats, 'index'):
+            self.indexes = self.cumulative_strategy.create_indexes(self.frequencies)
+
+    def restore(self, indexes, occurrences):
+        """
+        Restore the table from the transition indexes and occurrences of a previously loaded
+        table, without reading any data.
+
+        Parameters
+        ----------
+        indexes: dict
+                 Transition indexes as returned by the cumulative strategy. Keys of the
+                 'word_ending' index are followed by a space.
+        occurrences: dict
+                     Count of how many times each key occurs in the data.
+        """
+        self.indexes = indexes
+        if any(isinstance(index, CompactTransitionIndex) for index in indexes.values()):
+            self.frequencies = CompactFrequencies(indexes)
+        else:
+            self.frequencies = self._create_frequencies(indexes)
+        self._set_occurrences(occurrences)
+
+    def is_compact(self):
+        """
+        Return whether the table is stored in flat arrays, see compact.
+        """
+        return isinstance(self.frequencies, CompactFrequencies)
+
+    def compact(self):
+        """
+        Store the table in flat arrays instead of dictionaries and objects, taking several times
+        less memory. Frequencies are then read from the transition indexes. The table is expanded
+        back into dictionaries when names are added or removed.
+        """
+        if self.is_compact():
+            return
+        self.indexes = {name: CompactTransitionIndex.from_index(index)
+                        for (name, index) in self.indexes.items()}
+        self.frequencies = CompactFrequencies(self.indexes)
+        self._set_occurrences(CompactCounts.from_dict(self.occurrences))
+
+    def expand(self):
+        """
+        Store a compact table in dictionaries and objects again, see compact. Occurrences stay
+        compact until names are added or removed.
+        """
+        if not self.is_compact():
+            return
+        self.indexes = {name: TransitionIndex.from_arrays(*index.to_arrays())
+                        for (name, index) in self.indexes.items()}
+        self.frequencies = self._create_frequencies(self.indexes)
+
+    @staticmethod
+    def _create_frequencies(indexes):
+        """
+        Return the cumulative frequencies of the keys of transition indexes as a dictionary.
+        """
+        frequencies = dict()
+        frequencies = defaultdict(lambda: 0, frequencies)
+        for name, index in indexes.items():
+            ending = ' ' if name == 'word_ending' else ''
+            for context, (successors, cumulative_values) in index.items():
+                for successor, cumulative_value in zip(successors, cumulative_values):
+                    frequencies[context + successor + ending] = cumulative_value
+        return frequencies
+
+    def _update(self, names, sign):
+        self.expand()
+        if isinstance(self.occurrences, CompactCounts):
+            # Occurrences are only read from dictionaries once they change
+            occurrences = dict()
+            occurrences = defaultdict(lambda: 0, occurrences)
+            occurrences.update(self.occurrences.items())
+            self._set_occurrences(occurrences)
+        groups = super()._update(names, sign)
+        # Cumulate the updated groups again, and replace their contexts in the indexes
+        self.cumulative_strategy.execute_groups(self.frequencies, groups)
+        self.cumulative_strategy.update_indexes(self.indexes, self.frequencies, groups)
+        return groups
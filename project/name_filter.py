@@ -0,0 +1,63 @@
+"""This module filters generated names to keep them unique or novel."""
+
+class NameSpaceExhaustedError(RuntimeError):
+    """
+    Raised when a name generator keeps producing names that are filtered out, meaning that the
+    names it can reach are too few to satisfy the request.
+    """
+
+class NameFilter:
+    """
+    Filters a stream of generated names, dropping the names already produced (unique) and the
+    names of the sample data (novel). Membership checks are constant time, so names are produced
+    at nearly the rate of the generator until the names it can reach run out.
+    """
+
+    max_attempts = 10000
+    _seen_names = None
+    _known_names = None
+
+    def __init__(self, unique=False, known_names=None):
+        """
+        Parameters
+        ----------
+        unique: bool
+                Whether to drop the names already produced by this filter.
+        known_names: object
+                     Lowercase names to drop, supporting the in operator (i.e. a set or a
+                     BloomFilter). No name is dropped for being known if None.
+        """
+        self._seen_names = set() if unique else None
+        self._known_names = known_names
+
+    def apply(self, names, count=None):
+        """
+        Lazily yield the names that pass the filter.
+
+        Parameters
+        ----------
+        names: iterator
+               The generated names.
+        count: int
+               Number of names to yield. Names are yielded until names runs out if None.
+        """
+        produced = 0
+        attempts = 0
+        for name in names:
+            if count is not None and produced >= count:
+                return
+            attempts += 1
+            if (self._known_names is not None and name.lower() in self._known_names) or \
+                    (self._seen_names is not None and name in self._seen_names):
+                if attempts >= self.max_attempts:
+                    break
+                continue
+            if self._seen_names is not None:
+                self._seen_names.add(name)
+            attempts = 0
+            produced += 1
+            yield name
+        if count is None or produced < count:
+            raise NameSpaceExhaustedError(
+                'Could only generate %d names, the last %d names generated were all filtered '
+                'out' % (produced, attempts))
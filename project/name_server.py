@@ -0,0 +1,185 @@
+"""This module serves random names to local clients from models kept in memory."""
+
+import asyncio
+import json
+import os
+import weakref
+from collections import OrderedDict
+from itertools import islice
+from project.name_filter import NameSpaceExhaustedError
+from project.random_name_generator import RandomNameGenerator
+
+class NameServer:
+    """
+    Serves random names over a local socket with a line protocol: every request is a JSON
+    object on its own line, such as {"file": "greek_gods", "order": 2, "count": 10}, answered
+    by a JSON object on its own line holding either the list of "names" or an "error".
+    Requests may also ask for "unique" or "novel" names.
+
+    Trained generators stay in memory between requests, in a least recently used cache keyed
+    by sample data file, order and version of the file. Generators are trained, and names are
+    generated a chunk at a time, in background threads, so that a slow request never blocks the
+    other clients. The chunks of a generator are generated one at a time.
+    """
+
+    chunk_size = 1000
+    max_models = None
+    use_cache = None
+    compact = None
+    _generators = None
+    _locks = None
+
+    def __init__(self, max_models=8, use_cache=True, compact=False):
+        """
+        Parameters
+        ----------
+        max_models: int
+                    Maximum number of generators kept in memory.
+        use_cache: bool
+                   Whether to read and write compiled models when training generators.
+        compact: bool
+                 Whether to keep the models in flat arrays, taking less memory.
+        """
+        self.max_models = max_models
+        self.use_cache = use_cache
+        self.compact = compact
+        self._generators = OrderedDict()
+        self._locks = weakref.WeakKeyDictionary()
+
+    async def serve_tcp(self, host, port):
+        """
+        Serve clients connecting to a TCP port until cancelled.
+
+        Parameters
+        ----------
+        host: string
+              The address to listen on.
+        port: int
+              The port to listen on.
+        """
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_unix(self, path):
+        """
+        Serve clients connecting to a Unix socket until cancelled.
+
+        Parameters
+        ----------
+        path: string
+              Path of the socket.
+        """
+        server = await asyncio.start_unix_server(self._handle_connection, path)
+        async with server:
+            await server.serve_forever()
+
+    async def get_generator(self, file, order):
+        """
+        Return the generator of a sample data file, training it if it is not in memory yet.
+
+        Parameters
+        ----------
+        file: string
+              Name of the sample data file in the media directory, without extension.
+        order: int
+               The number of previous letters used to predict the next letter.
+        """
+        data_file = 'media/' + file + '.txt'
+        status = os.stat(data_file)
+        key = (file, order, status.st_mtime_ns, status.st_size)
+        generator = self._generators.get(key)
+        if generator is None:
+            # Requests arriving while the generator trains wait for the same training
+            params = {'file': file, 'order': order, 'cache': self.use_cache,
+                      'compact': self.compact}
+            generator = asyncio.get_running_loop().run_in_executor(
+                None, RandomNameGenerator, params)
+            self._generators[key] = generator
+            while len(self._generators) > self.max_models:
+                self._generators.popitem(last=False)
+        else:
+            self._generators.move_to_end(key)
+        try:
+            return await asyncio.shield(generator)
+        except Exception:
+            if self._generators.get(key) is generator:
+                del self._generators[key]
+            raise
+
+    async def handle_request(self, request):
+        """
+        Return the response to a request, as a dictionary.
+
+        Parameters
+        ----------
+        request: dict
+                 The decoded request.
+        """
+        file = request.get('file', 'greek_gods')
+        order = request.get('order', 2)
+        count = request.get('count', 10)
+        if not isinstance(file, str) or os.path.basename(file) != file or not file:
+            return {'error': 'Invalid file %r' % (file,)}
+        # Booleans are integers in Python, but not valid orders or counts
+        if not isinstance(order, int) or isinstance(order, bool) or order < 1:
+            return {'error': 'Invalid order %r' % (order,)}
+        if not isinstance(count, int) or isinstance(count, bool) or count < 0:
+            return {'error': 'Invalid count %r' % (count,)}
+        try:
+            generator = await self.get_generator(file, order)
+        except OSError as error:
+            return {'error': 'Cannot load %s: %s' % (file, error.strerror or error)}
+        except Exception as error:
+            return {'error': 'Cannot load %s: %s' % (file, error)}
+
+        unique = bool(request.get('unique'))
+        novel = bool(request.get('novel'))
+        loop = asyncio.get_running_loop()
+        # A generator is not thread safe, so only one thread uses it at a time
+        lock = self._locks.setdefault(generator, asyncio.Lock())
+        names = list()
+        try:
+            if novel:
+                # The names of the sample data are read on first use
+                async with lock:
+                    await loop.run_in_executor(None, generator.known_names)
+            name_iterator = generator.iter_names(count, unique, novel)
+            while len(names) < count:
+                async with lock:
+                    chunk = await loop.run_in_executor(
+                        None, list, islice(name_iterator, self.chunk_size))
+                if not chunk:
+                    break
+                names.extend(chunk)
+        except NameSpaceExhaustedError as error:
+            return {'error': str(error), 'names': names}
+        except Exception as error:
+            # i.e. a model trained from sample data without any name
+            return {'error': 'Cannot generate names from %s: %s' % (file, error)}
+        return {'names': names}
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Answer the requests of a client, one line at a time, until it disconnects.
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    response = {'error': 'Invalid JSON request'}
+                else:
+                    if isinstance(request, dict):
+                        response = await self.handle_request(request)
+                    else:
+                        response = {'error': 'Expected a JSON object'}
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
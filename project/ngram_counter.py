@@ -0,0 +1,101 @@
+"""Module for NGramCounter."""
+
+from collections import Counter, defaultdict
+
+class NGramCounter:
+    """
+    Counts the n-grams of data fed to it one chunk at a time. N-grams spanning two chunks are
+    counted once, exactly as if the whole data had been given at once. Only the last few letters
+    of the previous chunk are kept between chunks, so memory is bounded by the number of distinct
+    n-grams rather than by the size of the data.
+
+    Counters of consecutive parts of the same data can be merged, giving the same counts as a
+    single counter fed with all the parts in order.
+    """
+
+    max_length = None
+    min_length = None
+    _longest_occurrences = None
+    _pending = None
+    _prefix = None
+
+    def __init__(self, max_length, min_length=2):
+        """
+        Parameters
+        ----------
+        max_length: int
+                    Length of the longest n-grams to count.
+        min_length: int
+                    Length of the shortest n-grams to count.
+        """
+        self.max_length = max_length
+        self.min_length = min_length
+        self._longest_occurrences = Counter()
+        self._pending = ''
+        self._prefix = ''
+
+    def update(self, chunk):
+        """
+        Count the n-grams of the next chunk of data.
+
+        Parameters
+        ----------
+        chunk: string
+               The characters following the previous chunk.
+        """
+        if len(self._prefix) < self.max_length - 1:
+            self._prefix = (self._prefix + chunk)[:self.max_length - 1]
+        data = self._pending + chunk
+        # Only count the n-grams starting at positions with enough letters after them, the
+        # others may continue in the next chunk
+        complete = max(len(data) - self.max_length + 1, 0)
+        self._longest_occurrences.update(data[position:position + self.max_length]
+                                         for position in range(complete))
+        self._pending = data[complete:]
+
+    def merge(self, other):
+        """
+        Add the counts of another counter, fed with the data following the data of this counter.
+        Returns this counter.
+
+        Parameters
+        ----------
+        other: NGramCounter
+               A counter of the same n-gram lengths.
+        """
+        # The n-grams starting in the pending letters of this counter end in the first letters
+        # of the other counter
+        data = self._pending + other._prefix
+        complete = max(min(len(data) - self.max_length + 1, len(self._pending)), 0)
+        self._longest_occurrences.update(data[position:position + self.max_length]
+                                         for position in range(complete))
+        self._longest_occurrences.update(other._longest_occurrences)
+        if len(other._prefix) < self.max_length - 1:
+            # The other counter did not see enough letters to count anything by itself
+            self._pending = data[complete:]
+        else:
+            self._pending = other._pending
+        self._prefix = (self._prefix + other._prefix)[:self.max_length - 1]
+        return self
+
+    def occurrences(self):
+        """
+        Return a dictionary that contains the count of how many times each n-gram occurs in the
+        data fed so far, assuming the data ends there. N-grams with a space anywhere but at their
+        ends are left out.
+        """
+        # The last positions of the data only have room for shorter n-grams
+        longest_occurrences = self._longest_occurrences.copy()
+        longest_occurrences.update(self._pending[position:]
+                                   for position in range(len(self._pending)))
+
+        # Every shorter n-gram starting at a position is a prefix of the longest one
+        occurrences = dict()
+        occurrences = defaultdict(lambda: 0, occurrences)
+        for gram, value in longest_occurrences.items():
+            for length in range(self.min_length, len(gram) + 1):
+                key = gram[:length]
+                if ' ' in key[1:-1]:
+                    break
+                occurrences[key] += value
+        return occurrences
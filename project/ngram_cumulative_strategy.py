@@ -0,0 +1,90 @@
+"""This module implements the n-gram cumulative strategy for cumulative probability tables of any order."""
+
+from collections import defaultdict
+from project.transition_index import TransitionIndex
+from project.util.cumulative_roundoff import roundoff
+from project.util.key_group import key_group
+
+class NGramCumulativeStrategy:
+    """
+    This class transforms given frequencies (generated by the n-gram length strategy) into
+    cumulative frequencies.
+    """
+
+    @classmethod
+    def execute(cls, frequencies):
+        """
+        Will transform a non-cumulative probability table using n-grams into a cumulative
+        probability table using n-grams. In a cumulative table, the probability percentages for
+        keys sharing all letters but the last one are cumulative with the last key of the group
+        having a probability of 1.0. Keys ending with a space are grouped by all their letters
+        but the last two instead.
+        """
+        cumulative_values = dict()
+        cumulative_values = defaultdict(lambda: 0.0, cumulative_values)
+
+        # Walk the keys in sorted order once, keeping a running total for each group of keys
+        for key in sorted(frequencies):
+            group = key_group(key)
+            cumulative_values[group] = roundoff(cumulative_values[group] + frequencies[key])
+            frequencies[key] = cumulative_values[group]
+
+    @classmethod
+    def execute_groups(cls, frequencies, groups):
+        """
+        Will transform the frequencies of the given groups of keys into cumulative frequencies,
+        leaving the other keys unchanged.
+
+        Parameters
+        ----------
+        frequencies: dict
+                     The probability table, non-cumulative for the keys of the groups.
+        groups: dict
+                Dictionary of group to the keys it contains.
+        """
+        for keys in groups.values():
+            cumulative_value = 0.0
+            for key in sorted(keys):
+                cumulative_value = roundoff(cumulative_value + frequencies[key])
+                frequencies[key] = cumulative_value
+
+    @classmethod
+    def create_indexes(cls, frequencies):
+        """
+        Build the transition indexes of a cumulative probability table using n-grams. Contexts
+        of every length are stored in the same index.
+        The 'regular' index maps letters to the letters that may follow them, and the
+        'word_ending' index maps letters to the letters that may follow them right before a space.
+        """
+        regular_index = TransitionIndex()
+        word_ending_index = TransitionIndex()
+        for key in sorted(frequencies):
+            if key[-1] != ' ':
+                regular_index.add(key[:-1], key[-1], frequencies[key])
+            else:
+                word_ending_index.add(key[:-2], key[-2], frequencies[key])
+        return {'regular': regular_index, 'word_ending': word_ending_index}
+
+    @classmethod
+    def update_indexes(cls, indexes, frequencies, groups):
+        """
+        Replace the contexts of the given groups of keys in the transition indexes, after their
+        cumulative frequencies changed. Contexts of empty groups are removed.
+
+        Parameters
+        ----------
+        indexes: dict
+                 Transition indexes as returned by create_indexes.
+        frequencies: dict
+                     The cumulative probability table.
+        groups: dict
+                Dictionary of group to the keys it contains.
+        """
+        for (context, word_ending), keys in groups.items():
+            keys = sorted(keys)
+            if word_ending:
+                indexes['word_ending'].set(context, [key[-2] for key in keys],
+                                           [frequencies[key] for key in keys])
+            else:
+                indexes['regular'].set(context, [key[-1] for key in keys],
+                                       [frequencies[key] for key in keys])
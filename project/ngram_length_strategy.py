@@ -0,0 +1,84 @@
+"""This module implements the n-gram length strategy for probability tables of any order."""
+
+from collections import defaultdict
+from project.ngram_counter import NGramCounter
+from project.util.key_group import key_group
+
+class NGramLengthStrategy:
+    """
+    This class implements the n-gram length strategy to generate frequencies from given data to
+    load into probability tables. The order of a strategy is the number of letters a key uses to
+    predict the next letter: order 1 builds pairs, order 2 builds pairs and triplets, and so on.
+    All the orders from min_order to order are built in a single pass over the data.
+    """
+
+    order = None
+    min_order = None
+
+    def __init__(self, order, min_order=1):
+        """
+        Parameters
+        ----------
+        order: int
+               The maximum number of letters preceding the predicted letter.
+        min_order: int
+                   The minimum number of letters preceding the predicted letter.
+        """
+        if not 1 <= min_order <= order:
+            raise ValueError('Expected 1 <= min_order <= order, got min_order=%d and order=%d'
+                             % (min_order, order))
+        self.order = order
+        self.min_order = min_order
+
+    def create_frequencies(self, data):
+        """
+        Create a dictionary that contains every n-gram of characters in the data and the
+        frequency of this n-gram against all other n-grams sharing all letters but the last one.
+        N-grams ending with a space are grouped by all their letters but the last two instead.
+
+        Parameters
+        ----------
+        data: string
+              A string containing the characters from which to build a probability table.
+        """
+        return self.normalize(self.count_occurrences(data))
+
+    def normalize(self, occurrences):
+        """
+        Turn the occurrences of n-grams into their frequencies within their group.
+
+        Parameters
+        ----------
+        occurrences: dict
+                     Count of how many times each n-gram occurs in the data.
+        """
+        # Sum the occurrences of each group of n-grams in a single pass
+        totals = defaultdict(lambda: 0)
+        for key, value in occurrences.items():
+            totals[key_group(key)] += value
+
+        frequencies = dict()
+        frequencies = defaultdict(lambda: 0, frequencies)
+        for key, value in occurrences.items():
+            frequencies[key] = value / totals[key_group(key)]
+        return frequencies
+
+    def count_occurrences(self, data):
+        """
+        Creates a dictionary that contains the count of how many times each n-gram of characters
+        occurs in the data. N-grams with a space anywhere but at their ends are left out.
+
+        Parameters
+        ----------
+        data: string
+              A string containing the characters from which to build a probability table.
+        """
+        counter = self.create_counter()
+        counter.update(data)
+        return counter.occurrences()
+
+    def create_counter(self):
+        """
+        Return a new counter of the n-grams of this strategy, to count data one chunk at a time.
+        """
+        return NGramCounter(self.order + 1, self.min_order + 1)
@@ -0,0 +1,158 @@
+"""This module spreads the generation of random names across worker processes."""
+
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from project.name_filter import NameFilter
+from project.util.stats import Stats
+
+# Generator of the current worker process, sent once when the worker starts
+_worker_generator = None
+
+class ParallelNameGenerator:
+    """
+    Generates random names with a pool of worker processes. Names are generated in tasks of at
+    most task_size names, each task seeding the generator of its worker with a seed derived
+    from the seed of this generator and the position of the task. Tasks are yielded in order,
+    so the same seed always gives the same names whatever the number of processes.
+    """
+
+    task_size = 20000
+    processes = None
+    _name_generator = None
+    _known_names = None
+    _random = None
+
+    def __init__(self, name_generator, processes, seed=None):
+        """
+        Parameters
+        ----------
+        name_generator: object
+                        A RandomNameGenerator or BatchNameGenerator, sent to every worker.
+        processes: int
+                   Number of worker processes.
+        seed: int
+              Seed from which the seeds of the tasks are derived, or None to seed from the
+              operating system.
+        """
+        self.processes = processes
+        self._name_generator = name_generator
+        self._known_names = name_generator.known_names
+        self._random = random.Random(seed)
+
+    def seed(self, seed):
+        """
+        Reset the random number generator of this generator, so that the same names are
+        generated again for the same seed.
+        Parameters
+        ----------
+        seed: int
+              The new seed, or None to seed from the operating system.
+        """
+        self._random.seed(seed)
+
+    def generate_many(self, count, unique=False, novel=False):
+        """
+        Generate and return a new list of random names.
+        Parameters
+        ----------
+        count: int
+               Number of names to generate.
+        unique: bool
+                Whether to never generate the same name twice.
+        novel: bool
+               Whether to never generate a name of the sample data.
+        """
+        return list(self.iter_names(count, unique, novel))
+
+    def iter_names(self, count=None, unique=False, novel=False):
+        """
+        Lazily generate random names, one task at a time. NameSpaceExhaustedError is raised
+        when unique or novel names run out.
+        Parameters
+        ----------
+        count: int
+               Number of names to generate. Names are generated indefinitely if None.
+        unique: bool
+                Whether to never generate the same name twice.
+        novel: bool
+               Whether to never generate a name of the sample data.
+        """
+        # Every call draws a new base seed, so that successive calls give different names
+        base_seed = self._random.getrandbits(64)
+        if unique or novel:
+            # Names are filtered here so that they are unique across all the workers
+            name_filter = NameFilter(unique, self._known_names() if novel else None)
+            return name_filter.apply(
+                self._iter_generated(self._iter_filtered_task_sizes(count), base_seed), count)
+        return self._iter_generated(self._iter_task_sizes(count), base_seed)
+
+    def _iter_task_sizes(self, count):
+        """
+        Yield the sizes of the tasks generating count names, or names indefinitely if count is
+        None.
+        """
+        while count is None or count > 0:
+            size = self.task_size if count is None else min(count, self.task_size)
+            yield size
+            if count is not None:
+                count -= size
+
+    def _iter_filtered_task_sizes(self, count):
+        """
+        Indefinitely yield the sizes of the tasks generating names to be filtered down to count
+        names. Tasks start at count names and double in size, so that few names are thrown
+        away when few are filtered out. The sizes only depend on count, so that the same seed
+        gives the same names whatever the number of processes.
+        """
+        size = count if count is not None else self.task_size
+        while True:
+            yield max(min(size, self.task_size), 1)
+            size *= 2
+
+    def _iter_generated(self, task_sizes, base_seed):
+        """
+        Lazily generate random names in tasks of the given sizes, keeping two tasks per process
+        in flight.
+        """
+        with ProcessPoolExecutor(max_workers=self.processes, initializer=_initialize_worker,
+                                 initargs=(self._name_generator,)) as executor:
+            tasks = deque()
+            task = 0
+            try:
+                while True:
+                    while len(tasks) < 2 * self.processes:
+                        size = next(task_sizes, None)
+                        if size is None:
+                            break
+                        # String seeds are hashed, giving independent seeds for every task
+                        task_seed = random.Random('%d:%d' % (base_seed, task)).getrandbits(64)
+                        tasks.append(executor.submit(_generate_task, task_seed, size))
+                        task += 1
+                    if not tasks:
+                        return
+                    names, stats = tasks.popleft().result()
+                    if stats is not None:
+                        self._name_generator.stats.merge(stats)
+                    yield from names
+            finally:
+                # Do not wait for the tasks in flight when names stop being consumed
+                for pending_task in tasks:
+                    pending_task.cancel()
+
+def _initialize_worker(name_generator):
+    """
+    Keep the generator sent to a worker process for all its tasks.
+    """
+    global _worker_generator
+    _worker_generator = name_generator
+
+def _generate_task(seed, size):
+    """
+    Generate size names in a worker process from the given seed. Returns the names and the
+    statistics collected while generating them, if any.
+    """
+    _worker_generator.seed(seed)
+    if _worker_generator.stats is not None:
+        _worker_generator.stats = Stats()
+    return _worker_generator.generate_many(size), _worker_generator.stats
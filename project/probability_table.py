@@ -1,5 +1,10 @@
 """Module for ProbabilityTable."""
 
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from project.util.key_group import key_group
+from project.util.stats import timed
+
 class ProbabilityTable:
     """
     Represents the probability of a group of letters composed of 1..* letters being followed by
@@ -7,6 +12,9 @@ class ProbabilityTable:
     """
 
     frequencies = None
+    occurrences = None
+    stats = None
+    _group_keys = None
     _letter_length_strategy = None
     _data_loader = None
 
@@ -23,9 +31,144 @@ class ProbabilityTable:
             return None
         return len(self.frequencies) == 0
 
-    def load(self, data_name):
+    def load(self, data_name, processes=1, digest=None, chunk_consumers=()):
         """
         Helper method to load from a file that follows the expected format of data loader.
+        The data is counted one chunk at a time as the data loader reads it. With more than one
+        process, the shards of the data are counted in parallel and their counts merged before
+        computing frequencies, giving the same table as a single process.
+
+        Parameters
+        ----------
+        data_name: string
+                   The file to load.
+        processes: int
+                   Number of processes counting the data.
+        digest: object
+                A hash object (i.e. from hashlib) to update with the bytes of the file, if any.
+        chunk_consumers: list
+                         Functions called with every chunk of data, in order, so that other
+                         work on the data is done in the same pass as counting it.
+        """
+        with timed(self.stats, 'count'):
+            shards = self._data_loader.split(data_name, processes)
+            if len(shards) == 1:
+                counter = count_shard(self._letter_length_strategy, self._data_loader, data_name,
+                                      shards[0], digest, chunk_consumers)
+            else:
+                with ProcessPoolExecutor(max_workers=min(processes, len(shards))) as executor:
+                    counters = executor.map(count_shard,
+                                            [self._letter_length_strategy] * len(shards),
+                                            [self._data_loader] * len(shards),
+                                            [data_name] * len(shards),
+                                            shards)
+                    # The whole data is read in order while the workers count it
+                    if digest is not None or chunk_consumers:
+                        for chunk in self._data_loader.iter_chunks(data_name, None, digest):
+                            for chunk_consumer in chunk_consumers:
+                                chunk_consumer(chunk)
+                    counter = next(counters)
+                    for shard_counter in counters:
+                        counter.merge(shard_counter)
+            self._set_occurrences(counter.occurrences())
+        with timed(self.stats, 'normalize'):
+            self.frequencies = self._letter_length_strategy.normalize(self.occurrences)
+
+    def add_names(self, names):
+        """
+        Add names to the data of the table without loading it again. Only the frequencies of
+        the groups of keys found in the names are computed again.
+        Returns the updated groups, as a dictionary of group to the keys it now contains.
+
+        Parameters
+        ----------
+        names: list
+               The names to add.
+        """
+        return self._update(names, 1)
+
+    def remove_names(self, names):
+        """
+        Remove names previously loaded or added from the data of the table without loading it
+        again. Only the frequencies of the groups of keys found in the names are computed again.
+        Returns the updated groups, as a dictionary of group to the keys it now contains.
+
+        Parameters
+        ----------
+        names: list
+               The names to remove.
+        """
+        return self._update(names, -1)
+
+    def _update(self, names, sign):
+        """
+        Add (sign 1) or remove (sign -1) the occurrences of names, then compute again the
+        frequencies of the groups of keys they belong to.
+        """
+        counter = self._letter_length_strategy.create_counter()
+        counter.update(' ' + ' '.join(name.lower() for name in names) + ' ')
+        changes = counter.occurrences()
+        if sign < 0 and any(self.occurrences.get(key, 0) < value
+                            for (key, value) in changes.items()):
+            raise ValueError('Cannot remove names that are not in the data of the table')
+
+        if self._group_keys is None:
+            self._group_keys = defaultdict(set)
+            for key in self.occurrences:
+                self._group_keys[key_group(key)].add(key)
+        groups = dict()
+        for key, value in changes.items():
+            group = key_group(key)
+            occurrence = self.occurrences.get(key, 0) + sign * value
+            if occurrence:
+                self.occurrences[key] = occurrence
+                self._group_keys[group].add(key)
+            else:
+                del self.occurrences[key]
+                del self.frequencies[key]
+                self._group_keys[group].discard(key)
+            groups[group] = self._group_keys[group]
+
+        for group, keys in groups.items():
+            total = sum(self.occurrences[key] for key in keys)
+            for key in keys:
+                self.frequencies[key] = self.occurrences[key] / total
+            if not keys:
+                del self._group_keys[group]
+        return groups
+
+    def _set_occurrences(self, occurrences):
         """
-        data = self._data_loader.load(data_name)
-        self.frequencies = self._letter_length_strategy.create_frequencies(data)
+        Keep the occurrences the table was built from. They are grouped the same way as the keys
+        of the table the first time names are added or removed.
+        """
+        self.occurrences = occurrences
+        self._group_keys = None
+
+def count_shard(letter_length_strategy, data_loader, data_name, shard, digest=None,
+                chunk_consumers=()):
+    """
+    Count the occurrences of a shard of the data and return the counter.
+    Defined at module level so that it can run in worker processes.
+
+    Parameters
+    ----------
+    letter_length_strategy: object
+                            Strategy creating the counter.
+    data_loader: object
+                 Loader reading the data.
+    data_name: string
+               The file to load.
+    shard: object
+           The shard of the file to count, as returned by the split method of data loader.
+    digest: object
+            A hash object to update with the bytes of the shard, if any.
+    chunk_consumers: list
+                     Functions called with every chunk of the shard, in order.
+    """
+    counter = letter_length_strategy.create_counter()
+    for chunk in data_loader.iter_chunks(data_name, shard, digest):
+        counter.update(chunk)
+        for chunk_consumer in chunk_consumers:
+            chunk_consumer(chunk)
+    return counter
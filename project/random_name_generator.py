@@ -1,63 +1,574 @@
 """This module contains the business logic to generate random names."""
 
+import heapq
+import math
+import os
 import random
-from project.two_letter_length_strategy import TwoLetterLengthStrategy
-from project.three_letter_length_strategy import ThreeLetterLengthStrategy
-from project.two_letter_cumulative_strategy import TwoLetterCumulativeStrategy
-from project.three_letter_cumulative_strategy import ThreeLetterCumulativeStrategy
+from project.ngram_length_strategy import NGramLengthStrategy
+from project.ngram_cumulative_strategy import NGramCumulativeStrategy
 from project.cumulative_probability_table import CumulativeProbabilityTable
-from project.util.data_loader import FileDataLoader
+from project.name_filter import NameFilter
+from project.util.bloom_filter import BloomFilter
+from project.util.data_loader import ChunkedFileDataLoader, NameSplitter
+from project.util.model_cache import ModelCache
+from project.util.stats import timed
 
 class RandomNameGenerator:
     """
     Driver class to generate random names.
     """
 
-    generated_names = list()
-    pair_pr_table = None
-    triplet_pr_table = None
-    pair_pr_table_keys = None
-    triplet_pr_table_keys = None
+    name_length_distribution = (3, 3, 4, 4, 4, 5, 5, 5, 6, 6, 7, 8, 9)
+    # Bytes read from the start of the sample data to estimate the number of names
+    name_length_sample_size = 1 << 16
+    order = None
+    min_length = None
+    max_length = None
+    prefix = None
+    suffix = None
+    ngram_pr_table = None
+    stats = None
+    _regular_index = None
+    _word_ending_index = None
+    _closing_index = None
+    _ending_letters = None
+    _data_file = None
+    _data_loader = None
+    _known_names = None
+    _pending_known_names = None
+    _random = None
+    _target_lengths = None
+    _distributions = None
+    _completions = None
+    _log_distributions = None
 
     def __init__(self, params):
-        # Initialize probability table dependencies
-        two_letter_length_strategy = TwoLetterLengthStrategy()
-        three_letter_length_strategy = ThreeLetterLengthStrategy()
-        two_letter_cumulative_strategy = TwoLetterCumulativeStrategy()
-        three_letter_cumulative_strategy = ThreeLetterCumulativeStrategy()
-        file_data_loader = FileDataLoader()
-
         # Default if file is not given
         if params.get('file') is None:
             params['file'] = 'greek_gods'
+        # Default to predicting letters from up to two previous letters (pairs and triplets)
+        if params.get('order') is None:
+            params['order'] = 2
+        self.order = params['order']
+        self._random = random.Random(params.get('seed'))
+        self.stats = params.get('stats')
+        # Check the constraints before spending time on training the model
+        self.set_constraints(params.get('min_length'), params.get('max_length'),
+                             params.get('prefix') or '', params.get('suffix') or '')
+
+        # Initialize probability table dependencies
+        ngram_length_strategy = NGramLengthStrategy(self.order)
+        ngram_cumulative_strategy = NGramCumulativeStrategy()
+        file_data_loader = ChunkedFileDataLoader()
+        self._data_loader = file_data_loader
+
+        # Initialize n-gram probability table, holding every order from 1 to self.order
+        self.ngram_pr_table = CumulativeProbabilityTable(
+            ngram_length_strategy, ngram_cumulative_strategy, file_data_loader)
+        self.ngram_pr_table.stats = self.stats
+        self._data_file = 'media/' + params.get('file') + '.txt'
+        self._pending_known_names = list()
+        chunk_consumers = list()
+        if params.get('novel'):
+            # Collect the names of the sample data in the same pass as it is counted
+            known_names = self._create_known_names()
+            name_splitter = NameSplitter()
+            chunk_consumers.append(lambda chunk: known_names.update(name_splitter.update(chunk)))
+        with timed(self.stats, 'load'):
+            data_read = self._load_table(self._data_file, params.get('cache', True),
+                                         params.get('processes') or 1, chunk_consumers)
+            # Compiled models are read as compact tables. Expanded tables take more memory but
+            # are faster to sample from
+            if params.get('compact'):
+                self.ngram_pr_table.compact()
+            else:
+                self.ngram_pr_table.expand()
+        if chunk_consumers and data_read:
+            known_names.update(name_splitter.flush())
+            self._set_known_names(known_names)
+        self._regular_index = self.ngram_pr_table.indexes['regular']
+        self._word_ending_index = self.ngram_pr_table.indexes['word_ending']
+
+        self._build_closing_index()
+
+    def _load_table(self, data_file, use_cache, processes, chunk_consumers):
+        """
+        Load the probability table from the compiled model of the sample data if there is one,
+        otherwise train it from the sample data and compile it for the next time. Returns
+        whether the sample data was read.
+        Parameters
+        ----------
+        data_file: string
+                   Path to the file containing the sample data.
+        use_cache: bool
+                   Whether to read and write compiled models.
+        processes: int
+                   Number of processes training the table.
+        chunk_consumers: list
+                         Functions called with every chunk of the sample data, if it is read.
+        """
+        if not use_cache:
+            self.ngram_pr_table.load(data_file, processes, chunk_consumers=chunk_consumers)
+            return True
+        model_cache = ModelCache()
+        model_name = 'ngram%d' % self.order
+        if model_cache.exists(data_file, model_name):
+            # Compiled models are only used for the same sample data, checked by its hash
+            model_file = model_cache.path(data_file, model_name)
+            tables = model_cache.load(model_file)
+            if tables is not None:
+                with timed(self.stats, 'restore'):
+                    self.ngram_pr_table.restore(*tables['ngram'])
+                return False
+            self.ngram_pr_table.load(data_file, processes, chunk_consumers=chunk_consumers)
+        else:
+            # The sample data is hashed in the same pass as it is counted
+            digest = model_cache.create_digest()
+            self.ngram_pr_table.load(data_file, processes, digest, chunk_consumers)
+            model_file = model_cache.path(data_file, model_name, digest)
+        try:
+            model_cache.save(model_file, {'ngram': self.ngram_pr_table})
+        except OSError:
+            # The compiled model is only an optimization, the sample data may be read-only
+            pass
+        return True
+
+    def add_names(self, names):
+        """
+        Add names to the sample data of the model, only updating the contexts found in them.
+        Parameters
+        ----------
+        names: list
+               The names to add.
+        """
+        self._update_indexes(self.ngram_pr_table.add_names(names))
+        self._add_known_names(names)
+
+    def remove_names(self, names):
+        """
+        Remove names from the sample data of the model, only updating the contexts found in them.
+        Parameters
+        ----------
+        names: list
+               The names to remove. They must have been part of the sample data. They are still
+               considered known names when generating novel names.
+        """
+        self._update_indexes(self.ngram_pr_table.remove_names(names))
+        self._add_known_names(names)
+
+    def _add_known_names(self, names):
+        """
+        Mark names as known, keeping them until the known names are read if they are not yet.
+        """
+        if self._known_names is not None:
+            self._known_names.update(name.lower() for name in names)
+        else:
+            self._pending_known_names.extend(name.lower() for name in names)
+
+    def __getstate__(self):
+        # Generating names only needs the transition indexes, the probability table holds
+        # default dictionaries that cannot be pickled
+        state = self.__dict__.copy()
+        state['ngram_pr_table'] = None
+        return state
+
+    def seed(self, seed):
+        """
+        Reset the random number generator of this generator, so that the same names are
+        generated again for the same seed.
+        Parameters
+        ----------
+        seed: int
+              The new seed, or None to seed from the operating system.
+        """
+        self._random.seed(seed)
+
+    def set_constraints(self, min_length=None, max_length=None, prefix='', suffix=''):
+        """
+        Only generate names of a length within bounds, starting with a prefix and ending with a
+        suffix. Letters are sampled knowing how likely each of them is to lead to the suffix
+        in the remaining letters, so no name is ever rejected.
+        Parameters
+        ----------
+        min_length: int
+                    Minimum number of letters of a name, or None for no minimum.
+        max_length: int
+                    Maximum number of letters of a name, or None for no maximum.
+        prefix: string
+                The letters every name starts with.
+        suffix: string
+                The letters every name ends with.
+        """
+        self.min_length = min_length
+        self.max_length = max_length
+        self.prefix = prefix.lower()
+        self.suffix = suffix.lower()
+        self._reset_derived_tables()
+        if min_length is None and max_length is None and not prefix and not suffix:
+            self._target_lengths = None
+            return
+
+        lowest = max(min_length or 1, len(self.prefix) + len(self.suffix), 1)
+        highest = max_length if max_length is not None else float('inf')
+        if lowest > highest:
+            raise ValueError('No name length satisfies min_length=%s and max_length=%s with '
+                             'prefix %r and suffix %r' % (min_length, max_length, prefix, suffix))
+        # Names are one letter longer than their desired length when they end normally. Lengths
+        # are drawn from those of the distribution within bounds, or from the closest bound
+        # when there are none
+        lengths = [desired_length + 1 for desired_length in self.name_length_distribution]
+        self._target_lengths = [length for length in lengths if lowest <= length <= highest]
+        if not self._target_lengths:
+            self._target_lengths = [lowest if lowest > max(lengths) else highest]
+
+    def is_constrained(self):
+        """
+        Return whether names are generated under length, prefix or suffix constraints.
+        """
+        return self._target_lengths is not None
+
+    def known_names(self):
+        """
+        Return the lowercase names of the sample data as a BloomFilter, reading them on first use.
+        """
+        if self._known_names is None:
+            known_names = self._create_known_names()
+            known_names.update(self._data_loader.iter_names(self._data_file))
+            self._set_known_names(known_names)
+        return self._known_names
+
+    def _set_known_names(self, known_names):
+        """
+        Keep the names read from the sample data, along with the names added or removed since.
+        """
+        known_names.update(self._pending_known_names)
+        self._pending_known_names = None
+        self._known_names = known_names
+
+    def _create_known_names(self):
+        """
+        Return an empty BloomFilter large enough for the names of the sample data, whose
+        number is estimated from the average length of the names at the start of the file.
+        """
+        with open(self._data_file, 'rb') as f:
+            sample = f.read(self.name_length_sample_size)
+        sample_names = len(sample.split())
+        # Names are at least one letter and a space long
+        bytes_per_name = len(sample) / sample_names if sample_names else 2
+        # Leave room for a sample shorter than average and for names added later
+        return BloomFilter(int(os.path.getsize(self._data_file) / bytes_per_name * 1.25) + 1)
 
-        # Initialize pair probability table
-        self.pair_pr_table = CumulativeProbabilityTable(
-            two_letter_length_strategy, two_letter_cumulative_strategy, file_data_loader)
-        self.pair_pr_table.load('media/' + params.get('file') + '.txt')
-        self.pair_pr_table_keys = self.pair_pr_table.frequencies.keys()
+    def _build_closing_index(self):
+        """
+        Build the index of the contexts whose next letter can be followed by a word ending.
+        """
+        self._ending_letters = {context for context in self._word_ending_index.contexts()
+                                if len(context) == 1}
+        self._closing_index = self._regular_index.restrict(self._ending_letters)
+        self._reset_derived_tables()
 
-        # Initialize triplet probability table
-        self.triplet_pr_table = CumulativeProbabilityTable(
-            three_letter_length_strategy, three_letter_cumulative_strategy, file_data_loader)
-        self.triplet_pr_table.load('media/' + params.get('file') + '.txt')
-        self.triplet_pr_table_keys = self.triplet_pr_table.frequencies.keys()
+    def _update_indexes(self, groups):
+        """
+        Update the indexes after the given groups of the probability table changed. A compact
+        table is expanded when it changes, in which case every index is replaced.
+        """
+        if self._regular_index is not self.ngram_pr_table.indexes['regular']:
+            self._regular_index = self.ngram_pr_table.indexes['regular']
+            self._word_ending_index = self.ngram_pr_table.indexes['word_ending']
+            self._build_closing_index()
+            return
+        self._update_closing_index(groups)
+
+    def _update_closing_index(self, groups):
+        """
+        Update the closing index after the given groups of the probability table changed.
+        """
+        ending_letters = {context for (context, word_ending) in groups
+                          if word_ending and len(context) == 1}
+        if any((letter in self._word_ending_index) != (letter in self._ending_letters)
+               for letter in ending_letters):
+            # Letters that can be followed by a word ending changed, every context is affected
+            self._build_closing_index()
+            return
+        for context, word_ending in groups:
+            if not word_ending:
+                self._closing_index.set(
+                    context, *self._regular_index.restrict_context(context, self._ending_letters))
+        self._reset_derived_tables()
+
+    def _reset_derived_tables(self):
+        """
+        Forget the tables of constrained generation and scoring, computed again as they are
+        needed.
+        """
+        self._distributions = dict()
+        self._completions = dict()
+        self._log_distributions = dict()
 
     def generate(self):
         """
-        Generate a new random name.
+        Generate and return a new random name.
         """
-        # Start generating name
-        name = ' ' + self._get_starting_letter()
+        if self._target_lengths is not None:
+            name = self._generate_constrained()
+        else:
+            name = self._generate_unconstrained()
+        if self.stats is not None:
+            self.stats.count('names')
+            self.stats.count('name_length.%d' % len(name))
+        return name
+
+    def _generate_unconstrained(self):
+        """
+        Generate and return a new random name of the length given by name_length_distribution.
+        """
+        # Start generating name, the letter before the starting letter being a space
+        letters = [' ', self._get_starting_letter()]
         # Since the name already has a starting letter, the total name length will be
         # one more than the selected name_length_distribution selected
-        name_length_distribution = [3, 3, 4, 4, 4, 5, 5, 5, 6, 6, 7, 8, 9]
-        desired_length = name_length_distribution[random.randint(0, 12)]
+        desired_length = self.name_length_distribution[
+            self._random.randint(0, len(self.name_length_distribution) - 1)]
         for _ in range(desired_length - 1):
-            name += self._get_next_letter(name[len(name) - 2], name[len(name) - 1])
-        name += self._get_last_letter(name[len(name) - 2], name[len(name) - 1])
-        name = name.strip().capitalize()
-        self.generated_names.append(name)
+            letters.append(self._get_next_letter(letters))
+        last_letters = self._get_last_letter(letters)
+        if self.stats is not None:
+            # Every letter past the first one was added by a recursive call
+            self.stats.count('last_letter.recursion_depth.%d' % (len(last_letters) - 1))
+        letters.append(last_letters)
+        return ''.join(letters[1:]).capitalize()
+
+    def _generate_constrained(self):
+        """
+        Generate and return a new random name following the constraints of set_constraints.
+        """
+        length = self._target_lengths[self._random.randint(0, len(self._target_lengths) - 1)]
+        letters = [' '] + list(self.prefix)
+        for position in range(len(self.prefix) + 1, length - len(self.suffix) + 1):
+            letters.append(self._get_constrained_letter(letters, length - position + 1))
+        letters.extend(self.suffix)
+        return ''.join(letters[1:]).capitalize()
+
+    def _get_constrained_letter(self, letters, remaining):
+        """
+        Return the next letter in random name, weighting every letter by how likely it is to
+        complete the name with the suffix afterwards.
+        Parameters
+        ----------
+        letters: list
+                 Current letters in name, starting with a space.
+        remaining: int
+                   Number of letters left in name, including the one returned.
+        """
+        state = ''.join(letters[-self.order:])
+        successors, probabilities = self._get_distribution(state, remaining == 1)
+        if self.suffix:
+            weights = [probability * self._get_completion(remaining - 1, state + successor)
+                       for (successor, probability) in zip(successors, probabilities)]
+            # When the model cannot reach the suffix at all, the suffix is forced anyway
+            if sum(weights) > 0:
+                probabilities = weights
+        return self._random.choices(successors, probabilities)[0]
+
+    def _get_completion(self, remaining, letters):
+        """
+        Return the probability that the model completes a name ending with letters with
+        remaining more letters, the last of which form the suffix. Probabilities are computed
+        once for every state and number of remaining letters, in one table per number of
+        remaining letters filled from one remaining letter upward.
+        Parameters
+        ----------
+        remaining: int
+                   Number of letters left in name.
+        letters: string
+                 The last letters of name.
+        """
+        if remaining == 0:
+            return 1.0
+        state = letters[-self.order:]
+        completion = self._completions.setdefault(remaining, dict()).get(state)
+        if completion is not None:
+            return completion
+        # Find the states missing from every table, from the most remaining letters down
+        missing = dict()
+        states = {state}
+        for length in range(remaining, 0, -1):
+            completions = self._completions.setdefault(length, dict())
+            states = {state for state in states if state not in completions}
+            if not states:
+                break
+            missing[length] = states
+            states = {(state + successor)[-self.order:] for state in states
+                      for (successor, _) in self._get_completion_successors(length, state)}
+        # Then fill the tables from the fewest remaining letters up
+        for length in sorted(missing):
+            completions = self._completions[length]
+            next_completions = self._completions.get(length - 1)
+            for state in missing[length]:
+                completions[state] = sum(
+                    probability * (next_completions[(state + successor)[-self.order:]]
+                                   if next_completions is not None else 1.0)
+                    for (successor, probability)
+                    in self._get_completion_successors(length, state))
+        return self._completions[remaining][state]
+
+    def _get_completion_successors(self, remaining, state):
+        """
+        Return the letters that may follow state with remaining letters left in name, along
+        with their probabilities. Only the letter of the suffix is returned within the suffix.
+        """
+        successors, probabilities = self._get_distribution(state, remaining == 1)
+        if remaining <= len(self.suffix):
+            forced = self.suffix[-remaining]
+            return [(successor, probability) for (successor, probability)
+                    in zip(successors, probabilities) if successor == forced]
+        return list(zip(successors, probabilities))
+
+    def _get_distribution(self, state, last):
+        """
+        Return the letters that may follow the last letters of a name and their
+        probabilities, following the same contexts as _get_next_letter and _get_last_letter.
+        Parameters
+        ----------
+        state: string
+               The last letters of name, starting with a space at the start of name.
+        last: bool
+              Whether the letter ends the name.
+        """
+        key = (state, last)
+        distribution = self._distributions.get(key)
+        if distribution is None:
+            context = None
+            if last:
+                context = (self._word_ending_index.find_longest(state)
+                           or self._closing_index.find_longest(state))
+            if context is None:
+                context = (self._regular_index.find_longest(state)
+                           or self._regular_index.find_longest(' '))
+            probabilities = list()
+            previous_value = 0.0
+            for cumulative_value in context.cumulative_values:
+                probabilities.append(max(cumulative_value - previous_value, 0.0))
+                previous_value = cumulative_value
+            distribution = (context.successors, probabilities)
+            self._distributions[key] = distribution
+        return distribution
+
+    def _get_log_distribution(self, state, last):
+        """
+        Return a dictionary of the letters that may follow the last letters of a name to their
+        log-probability, see _get_distribution.
+        """
+        key = (state, last)
+        log_distribution = self._log_distributions.get(key)
+        if log_distribution is None:
+            log_distribution = {successor: math.log(probability) for (successor, probability)
+                                in zip(*self._get_distribution(state, last)) if probability > 0}
+            self._log_distributions[key] = log_distribution
+        return log_distribution
+
+    def score(self, name):
+        """
+        Return the log-probability of a name under the model, see score_many.
+        Parameters
+        ----------
+        name: string
+              The name to score.
+        """
+        return self.score_many([name])[0]
+
+    def score_many(self, names):
+        """
+        Return the log-probability of each name under the model, as a list. Every letter is
+        predicted from the same contexts as when generating names of its length, the last
+        letter from the contexts of word endings. Names with a letter the model never predicts
+        there score minus infinity.
+        Parameters
+        ----------
+        names: list
+               The names to score.
+        """
+        scores = list()
+        for name in names:
+            letters = ' ' + name.lower()
+            log_probability = 0.0
+            for position in range(1, len(letters)):
+                log_distribution = self._get_log_distribution(
+                    letters[max(position - self.order, 0):position], position == len(letters) - 1)
+                log_probability += log_distribution.get(letters[position], -math.inf)
+            scores.append(log_probability)
+        return scores
+
+    def top_k(self, k, length, beam_width=None):
+        """
+        Return the k most probable names of a given length with their log-probability, most
+        probable first, found by a beam search keeping the beam_width most probable beginnings
+        of names at every letter.
+        Parameters
+        ----------
+        k: int
+           Number of names to return.
+        length: int
+                Number of letters of the names.
+        beam_width: int
+                    Number of beginnings of names kept at every letter. Defaults to 4 * k, the
+                    search being exact when it is large enough to hold every beginning.
+        """
+        if beam_width is None:
+            beam_width = 4 * k
+        beams = [(0.0, ' ')]
+        for position in range(1, length + 1):
+            candidates = list()
+            for log_probability, letters in beams:
+                log_distribution = self._get_log_distribution(letters[-self.order:],
+                                                              position == length)
+                candidates.extend((log_probability + letter_log_probability, letters + letter)
+                                  for (letter, letter_log_probability)
+                                  in log_distribution.items())
+            beams = heapq.nlargest(max(beam_width, k), candidates)
+        return [(letters[1:].capitalize(), log_probability)
+                for (log_probability, letters) in beams[:k]]
+
+    def generate_many(self, count, unique=False, novel=False):
+        """
+        Generate and return a new list of random names.
+        Parameters
+        ----------
+        count: int
+               Number of names to generate.
+        unique: bool
+                Whether to never generate the same name twice.
+        novel: bool
+               Whether to never generate a name of the sample data.
+        """
+        return list(self.iter_names(count, unique, novel))
+
+    def iter_names(self, count=None, unique=False, novel=False):
+        """
+        Lazily generate random names one at a time. NameSpaceExhaustedError is raised when
+        unique or novel names run out.
+        Parameters
+        ----------
+        count: int
+               Number of names to generate. Names are generated indefinitely if None.
+        unique: bool
+                Whether to never generate the same name twice.
+        novel: bool
+               Whether to never generate a name of the sample data.
+        """
+        if unique or novel:
+            name_filter = NameFilter(unique, self.known_names() if novel else None)
+            return name_filter.apply(self._iter_generated(), count)
+        return self._iter_generated(count)
+
+    def _iter_generated(self, count=None):
+        """
+        Lazily generate count random names, or names indefinitely if count is None.
+        """
+        if count is None:
+            while True:
+                yield self.generate()
+        for _ in range(count):
+            yield self.generate()
 
     def _get_starting_letter(self):
         """
@@ -65,73 +576,51 @@ class RandomNameGenerator:
         when we do not have any information from previous letters.
         (i.e. missing pairs in sample data)
         """
-        random_number = random.uniform(0, 1)
-        starting_letter = sorted({k:v for (k, v) in self.pair_pr_table.frequencies.items()
-                                  if k[0] == ' '
-                                  and k[1] != ' '
-                                  and v >= random_number}.keys())[0][1]
-        return starting_letter
+        return self._regular_index.sample(' ', self._random.uniform(0, 1))
 
-    def _get_next_letter(self, second_to_last_letter, last_letter):
+    def _get_next_letter(self, letters):
         """
-        Return the next letter in random name when we have both the first and second letter defined.
+        Return the next letter in random name, based on the longest context of the sample data
+        that the name ends with.
         Parameters
         ----------
-        second_to_last_letter: char
-                               Current second-to-last letter in name.
-        last_letter: char
-                     Current last letter in name.
-        """
-        random_number = random.uniform(0, 1)
-        next_letter = None
-        if any(key[0] == second_to_last_letter and key[1] == last_letter and key[2] != ' '
-               for key in self.triplet_pr_table_keys):
-            # Determine next letter based on triplets
-            next_letter = sorted({k:v for (k, v) in self.triplet_pr_table.frequencies.items()
-                                  if k[0] == second_to_last_letter
-                                  and k[1] == last_letter
-                                  and k[2] != ' '
-                                  and v >= random_number}.keys())[0][2]
-        elif any(key[0] == last_letter and key[1] != ' ' for key in self.pair_pr_table_keys):
-            # Determine next letter based on pairs
-            next_letter = sorted({k:v for (k, v) in self.pair_pr_table.frequencies.items()
-                                  if k[0] == last_letter
-                                  and k[1] != ' '
-                                  and v >= random_number}.keys())[0][1]
-        else:
-            # Generate a random letter
-            next_letter = self._get_starting_letter()
-        return next_letter
+        letters: list
+                 Current letters in name, starting with a space.
+        """
+        context = self._regular_index.find_longest(letters)
+        if context is not None:
+            if self.stats is not None:
+                self.stats.count('next_letter.context_length.%d' % context.depth)
+            return context.sample(self._random.uniform(0, 1))
+        # Generate a random letter
+        if self.stats is not None:
+            self.stats.count('next_letter.random_letter')
+        return self._get_starting_letter()
 
-    def _get_last_letter(self, second_to_last_letter, last_letter):
+    def _get_last_letter(self, letters):
         """
-        Return the last letter in random name when all other letters are defined.
+        Return the last letter in random name when all other letters are defined. Two letters
+        are returned when one more letter is needed to reach a word ending.
         Parameters
         ----------
-        second_to_last_letter: char
-                               Second-to-last letter in name.
-        last_letter: char
-                     Last letter in name.
-        """
-        random_number = random.uniform(0, 1)
-        # Try to get last letter using triplets starting with last_letter
-        if any(key[0] == last_letter and key[2] == ' '
-               for key in self.triplet_pr_table_keys):
-            new_last_letter = sorted({k:v for (k, v) in self.triplet_pr_table.frequencies.items()
-                                      if k[0] == last_letter
-                                      and k[2] == ' '
-                                      and v >= random_number}.keys())[0][1]
-            return new_last_letter
-        # Try to get a triplet that starts with last_letter, has it's second letter be
-        # the first letter in space ending triplet and does not end with a space
-        valid_letters = map(lambda k: k[0], [key for key in self.triplet_pr_table_keys
-                                             if key[2] == ' '])
-        if any(key[0] == last_letter and key[1] == letter
-               for (key, letter) in zip(self.pair_pr_table_keys, valid_letters)):
-            new_last_letter = sorted({k:v for (k, v) in self.pair_pr_table.frequencies.items()
-                                      if k[0] == last_letter
-                                      and any(k[1] == letter for letter in valid_letters)
-                                      and v >= random_number}.keys())[0][1]
-            return new_last_letter + self._get_last_letter(new_last_letter, second_to_last_letter)
+        letters: list
+                 Current letters in name, starting with a space.
+        """
+        random_number = self._random.uniform(0, 1)
+        # Try to get last letter using n-grams ending with a space
+        context = self._word_ending_index.find_longest(letters)
+        if context is not None:
+            if self.stats is not None:
+                self.stats.count('last_letter.word_ending.context_length.%d' % context.depth)
+            return context.sample(random_number)
+        # Try to get a next letter that starts an n-gram ending with a space
+        context = self._closing_index.find_longest(letters)
+        if context is not None:
+            if self.stats is not None:
+                self.stats.count('last_letter.closing.context_length.%d' % context.depth)
+            new_last_letter = context.sample(random_number)
+            return new_last_letter + self._get_last_letter(letters + [new_last_letter])
         # If all else fails, try using regular get_next_letter
-        return self._get_next_letter(second_to_last_letter, last_letter)
+        if self.stats is not None:
+            self.stats.count('last_letter.next_letter')
+        return self._get_next_letter(letters)
@@ -0,0 +1,289 @@
+"""Module for TransitionIndex."""
+
+from array import array
+from bisect import bisect_left
+
+class ContextNode:
+    """
+    A context of a transition index, holding the letters that may follow it. Nodes are linked
+    from the last letter of a context to its first one, so that the children of the node of a
+    context are the contexts extending it with one more letter in front.
+    """
+
+    __slots__ = ('depth', 'children', 'successors', 'cumulative_values')
+
+    def __init__(self, depth):
+        self.depth = depth
+        self.children = dict()
+        self.successors = None
+        self.cumulative_values = None
+
+    def __getstate__(self):
+        # Cumulative values may be views of a memory-mapped compiled model
+        cumulative_values = self.cumulative_values
+        if cumulative_values is not None:
+            cumulative_values = list(cumulative_values)
+        return self.depth, self.children, self.successors, cumulative_values
+
+    def __setstate__(self, state):
+        self.depth, self.children, self.successors, self.cumulative_values = state
+
+    def sample(self, random_number):
+        """
+        Return the first successor whose cumulative probability is at least random_number.
+
+        Parameters
+        ----------
+        random_number: float
+                       A number between 0 and 1.
+        """
+        position = bisect_left(self.cumulative_values, random_number)
+        # Cumulative values are rounded off, so the last one may fall just short of 1.0
+        if position == len(self.successors):
+            position -= 1
+        return self.successors[position]
+
+class TransitionIndex:
+    """
+    Precomputed lookup from a context (the letters read so far) to the letters that may follow it.
+    Each context holds its successor letters in sorted order alongside their cumulative
+    probabilities, so picking a letter is a binary search over the successors of that context
+    instead of a scan over the whole probability table.
+
+    Contexts of every length share a single trie read from their last letter backwards, so the
+    longest context matching the end of a name is found in one walk whatever the number of
+    contexts.
+    """
+
+    _root = None
+    _size = None
+
+    def __init__(self):
+        self._root = ContextNode(0)
+        self._size = 0
+
+    def __contains__(self, context):
+        node = self._find(context)
+        return node is not None and node.successors is not None
+
+    def __len__(self):
+        return self._size
+
+    def contexts(self):
+        """
+        Return all the contexts that have at least one successor.
+        """
+        return (context for (context, _) in self.items())
+
+    def items(self):
+        """
+        Return all the contexts along with their successors and cumulative probabilities.
+        """
+        nodes = [('', self._root)]
+        while nodes:
+            context, node = nodes.pop()
+            if node.successors is not None:
+                yield context, (node.successors, node.cumulative_values)
+            for letter, child in node.children.items():
+                nodes.append((letter + context, child))
+
+    @classmethod
+    def from_arrays(cls, contexts, offsets, successors, cumulative_values):
+        """
+        Build an index from its flat representation, see to_arrays.
+        """
+        index = cls()
+        for position, context in enumerate(contexts):
+            start, end = offsets[position], offsets[position + 1]
+            node = index._insert(context)
+            node.successors = successors[start:end]
+            node.cumulative_values = cumulative_values[start:end]
+            index._size += 1
+        return index
+
+    def to_arrays(self):
+        """
+        Return a flat representation of the index: the list of contexts, the offsets where the
+        successors of each context start (followed by the total number of successors), all
+        the successors as a single string and their cumulative probabilities as an array.
+        """
+        contexts = list()
+        offsets = array('I', [0])
+        successors = list()
+        cumulative_values = array('d')
+        for context, (context_successors, context_values) in self.items():
+            contexts.append(context)
+            successors.extend(context_successors)
+            cumulative_values.extend(context_values)
+            offsets.append(len(successors))
+        return contexts, offsets, ''.join(successors), cumulative_values
+
+    def add(self, context, successor, cumulative_value):
+        """
+        Append a successor to a context. Successors of a context must be added in sorted order.
+
+        Parameters
+        ----------
+        context: string
+                 The letters preceding the successor.
+        successor: char
+                   The letter following the context.
+        cumulative_value: float
+                          Cumulative probability of the successor within its context.
+        """
+        node = self._insert(context)
+        if node.successors is None:
+            node.successors = list()
+            node.cumulative_values = list()
+            self._size += 1
+        node.successors.append(successor)
+        node.cumulative_values.append(cumulative_value)
+
+    def set(self, context, successors, cumulative_values):
+        """
+        Replace all the successors of a context. The context is removed if there are none.
+
+        Parameters
+        ----------
+        context: string
+                 The letters preceding the successors.
+        successors: list
+                    The letters following the context, in sorted order.
+        cumulative_values: list
+                           Cumulative probability of each successor within the context.
+        """
+        if not successors:
+            node = self._find(context)
+            if node is not None and node.successors is not None:
+                node.successors = None
+                node.cumulative_values = None
+                self._size -= 1
+            return
+        node = self._insert(context)
+        if node.successors is None:
+            self._size += 1
+        node.successors = list(successors)
+        node.cumulative_values = list(cumulative_values)
+
+    def get(self, context):
+        """
+        Return the successors of a context and their cumulative probabilities, or None if the
+        context is not in the index.
+
+        Parameters
+        ----------
+        context: string
+                 The letters preceding the successors.
+        """
+        node = self._find(context)
+        if node is None or node.successors is None:
+            return None
+        return node.successors, node.cumulative_values
+
+    def sample(self, context, random_number):
+        """
+        Return the first successor of context whose cumulative probability is at least
+        random_number.
+
+        Parameters
+        ----------
+        context: string
+                 The letters preceding the successor. Must be contained in the index.
+        random_number: float
+                       A number between 0 and 1.
+        """
+        return self._find(context).sample(random_number)
+
+    def find_longest(self, letters):
+        """
+        Return the node of the longest context with successors that the letters end with, or
+        None when not even the last letter is such a context. The empty context is never
+        returned.
+
+        Parameters
+        ----------
+        letters: sequence
+                 The letters read so far.
+        """
+        node = self._root
+        longest = None
+        for position in range(len(letters) - 1, -1, -1):
+            node = node.children.get(letters[position])
+            if node is None:
+                break
+            if node.successors is not None:
+                longest = node
+        return longest
+
+    def restrict(self, letters):
+        """
+        Return a new index only keeping the successors contained in letters, with the
+        probabilities of each context scaled back up so that they add up to 1.0.
+        Contexts left without successors are dropped.
+
+        Parameters
+        ----------
+        letters: set
+                 The successors to keep.
+        """
+        restricted = TransitionIndex()
+        for context in self.contexts():
+            restricted.set(context, *self.restrict_context(context, letters))
+        return restricted
+
+    def restrict_context(self, context, letters):
+        """
+        Return the successors of a context contained in letters and their cumulative
+        probabilities, scaled back up so that they add up to 1.0. Both are empty if the context
+        is not in the index or none of its successors are in letters.
+
+        Parameters
+        ----------
+        context: string
+                 The letters preceding the successors.
+        letters: set
+                 The successors to keep.
+        """
+        node = self._find(context)
+        if node is None or node.successors is None:
+            return [], []
+        kept = list()
+        previous_value = 0.0
+        for successor, cumulative_value in zip(node.successors, node.cumulative_values):
+            if successor in letters:
+                kept.append((successor, cumulative_value - previous_value))
+            previous_value = cumulative_value
+        total = sum(probability for (_, probability) in kept)
+        if total <= 0:
+            return [], []
+        successors = list()
+        cumulative_values = list()
+        cumulative_value = 0.0
+        for successor, probability in kept:
+            cumulative_value += probability / total
+            successors.append(successor)
+            cumulative_values.append(cumulative_value)
+        return successors, cumulative_values
+
+    def _find(self, context):
+        """
+        Return the node of a context, or None if the context is not in the trie.
+        """
+        node = self._root
+        for position in range(len(context) - 1, -1, -1):
+            node = node.children.get(context[position])
+            if node is None:
+                return None
+        return node
+
+    def _insert(self, context):
+        """
+        Return the node of a context, creating it and its missing suffixes if needed.
+        """
+        node = self._root
+        for position in range(len(context) - 1, -1, -1):
+            letter = context[position]
+            if letter not in node.children:
+                node.children[letter] = ContextNode(node.depth + 1)
+            node = node.children[letter]
+        return node
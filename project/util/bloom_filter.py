@@ -0,0 +1,67 @@
+"""Utility module for BloomFilter."""
+
+import hashlib
+import math
+
+class BloomFilter:
+    """
+    Probabilistic set of strings using a fixed amount of memory. Strings added to the filter are
+    always reported as contained in it, while strings never added are reported as contained with
+    a small false positive rate.
+    """
+
+    _bits = None
+    _bit_count = None
+    _hash_count = None
+
+    def __init__(self, capacity, false_positive_rate=0.001):
+        """
+        Parameters
+        ----------
+        capacity: int
+                  Expected number of strings in the filter.
+        false_positive_rate: float
+                             Expected rate of false positives once capacity strings are added.
+        """
+        capacity = max(capacity, 1)
+        self._bit_count = max(int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2), 8)
+        self._hash_count = max(round(self._bit_count / capacity * math.log(2)), 1)
+        self._bits = bytearray((self._bit_count + 7) // 8)
+
+    def __contains__(self, string):
+        return all(self._bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(string))
+
+    def add(self, string):
+        """
+        Add a string to the filter.
+
+        Parameters
+        ----------
+        string: string
+                The string to add.
+        """
+        for position in self._positions(string):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def update(self, strings):
+        """
+        Add strings to the filter.
+
+        Parameters
+        ----------
+        strings: iterable
+                 The strings to add.
+        """
+        for string in strings:
+            self.add(string)
+
+    def _positions(self, string):
+        """
+        Return the positions of the bits of a string, derived from two halves of a single hash.
+        """
+        digest = hashlib.blake2b(string.encode('utf-8'), digest_size=16).digest()
+        first_hash = int.from_bytes(digest[:8], 'little')
+        second_hash = int.from_bytes(digest[8:], 'little') | 1
+        return [(first_hash + i * second_hash) % self._bit_count
+                for i in range(self._hash_count)]
@@ -0,0 +1,132 @@
+"""Utility module for read-only mappings stored in flat arrays."""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+class CompactCounts(Mapping):
+    """
+    Read-only mapping of strings to counts, stored as the code points of the keys joined
+    together in sorted order, the offsets where each key starts and an array of counts. Keys are
+    only turned into strings when they are looked up or iterated over.
+    """
+
+    _code_points = None
+    _offsets = None
+    _counts = None
+
+    def __init__(self, code_points, offsets, counts):
+        """
+        Parameters
+        ----------
+        code_points: array
+                     Code points of the sorted keys joined together.
+        offsets: array
+                 Offsets where each key starts, followed by the total number of code points.
+        counts: array
+                The count of each key.
+        """
+        self._code_points = code_points
+        self._offsets = offsets
+        self._counts = counts
+
+    @classmethod
+    def from_dict(cls, counts):
+        """
+        Build a compact mapping holding the same counts as a dictionary.
+
+        Parameters
+        ----------
+        counts: dict
+                Dictionary of string to count.
+        """
+        keys = sorted(counts)
+        offsets = array('I', [0])
+        for key in keys:
+            offsets.append(offsets[-1] + len(key))
+        code_points = array('I', map(ord, ''.join(keys)))
+        return cls(code_points, offsets, array('Q', (counts[key] for key in keys)))
+
+    def arrays(self):
+        """
+        Return the code points of the keys, their offsets and the counts.
+        """
+        return self._code_points, self._offsets, self._counts
+
+    def __getitem__(self, key):
+        position = bisect_left(range(len(self._counts)), key, key=self._key)
+        if position == len(self._counts) or self._key(position) != key:
+            raise KeyError(key)
+        return self._counts[position]
+
+    def __iter__(self):
+        # Decoding all the keys at once is much faster than one key at a time
+        letters = ''.join(map(chr, self._code_points))
+        offsets = self._offsets
+        return (letters[offsets[position]:offsets[position + 1]]
+                for position in range(len(self._counts)))
+
+    def items(self):
+        """
+        Return the keys and their counts in sorted order, without looking up every key.
+        """
+        return zip(self, self._counts)
+
+    def __len__(self):
+        return len(self._counts)
+
+    def _key(self, position):
+        """
+        Return the key at a position.
+        """
+        start, end = self._offsets[position], self._offsets[position + 1]
+        return ''.join(map(chr, self._code_points[start:end]))
+
+class CompactFrequencies(Mapping):
+    """
+    Read-only view of the cumulative frequencies of a table through its transition indexes, so
+    that they are not stored twice. Keys of the 'word_ending' index are followed by a space.
+    Missing keys have a frequency of 0, like in the frequencies of ProbabilityTable.
+    """
+
+    _indexes = None
+
+    def __init__(self, indexes):
+        """
+        Parameters
+        ----------
+        indexes: dict
+                 Transition indexes as returned by the cumulative strategy.
+        """
+        self._indexes = indexes
+
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        return value if value is not None else 0
+
+    def __contains__(self, key):
+        return self._lookup(key) is not None
+
+    def __iter__(self):
+        for name, index in self._indexes.items():
+            ending = ' ' if name == 'word_ending' else ''
+            for context, (successors, _) in index.items():
+                for successor in successors:
+                    yield context + successor + ending
+
+    def __len__(self):
+        return sum(len(successors) for index in self._indexes.values()
+                   for (_, (successors, _)) in index.items())
+
+    def _lookup(self, key):
+        """
+        Return the cumulative frequency of a key, or None if the key is not in the indexes.
+        """
+        if key.endswith(' '):
+            context, successor = self._indexes['word_ending'].get(key[:-2]), key[-2:-1]
+        else:
+            context, successor = self._indexes['regular'].get(key[:-1]), key[-1:]
+        if not successor or context is None or successor not in context[0]:
+            return None
+        successors, cumulative_values = context
+        return cumulative_values[successors.index(successor)]
@@ -1,5 +1,9 @@
 """Utility module to load data."""
 
+import codecs
+import locale
+import os
+
 class FileDataLoader:
     """
     Load the data from a file containing a plain text sample data of names
@@ -16,3 +20,150 @@ class FileDataLoader:
         with open(file, 'r') as f:
             data = f.read().replace('\n', '').lower()
         return data
+
+class ChunkedFileDataLoader:
+    """
+    Load the data from a file containing a plain text sample data of names separated by spaces
+    or line breaks, reading it in chunks of a fixed size so that very large files never have to
+    fit in memory. Line breaks are read as spaces, so that names on separate lines are never
+    joined together. The file can also be split into shards read independently of each other.
+    """
+
+    chunk_size = None
+
+    def __init__(self, chunk_size=1 << 20):
+        """
+        Parameters
+        ----------
+        chunk_size: int
+                    Number of bytes to read at a time.
+        """
+        self.chunk_size = chunk_size
+
+    def load(self, file):
+        """
+        Parameters
+        ----------
+        file: object
+              A file containing plain text sample data of names.
+        """
+        return ''.join(self.iter_chunks(file))
+
+    def iter_chunks(self, file, shard=None, digest=None):
+        """
+        Yield the data of the file one chunk at a time.
+
+        Parameters
+        ----------
+        file: object
+              A file containing plain text sample data of names.
+        shard: tuple
+               Start and end byte offsets of the part of the file to read, as returned by split.
+               The whole file is read if None.
+        digest: object
+                A hash object (i.e. from hashlib) updated with the bytes read, if any, so that
+                the file is hashed in the same pass as it is read.
+        """
+        start, end = shard if shard is not None else (0, None)
+        decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))()
+        with open(file, 'rb') as f:
+            f.seek(start)
+            remaining = end - start if end is not None else None
+            while remaining is None or remaining > 0:
+                size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+                raw_chunk = f.read(size)
+                if not raw_chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(raw_chunk)
+                if digest is not None:
+                    digest.update(raw_chunk)
+                yield self._normalize(decoder.decode(raw_chunk))
+        yield self._normalize(decoder.decode(b'', final=True))
+
+    def split(self, file, count):
+        """
+        Split the file into at most count shards of about the same size, returned as a list of
+        start and end byte offsets. Shards always end right after a space or a line break, and
+        are never smaller than a chunk.
+
+        Parameters
+        ----------
+        file: object
+              A file containing plain text sample data of names.
+        count: int
+               Maximum number of shards.
+        """
+        size = os.path.getsize(file)
+        count = max(min(count, size // self.chunk_size), 1)
+        boundaries = [0]
+        with open(file, 'rb') as f:
+            for shard in range(1, count):
+                position = max(size * shard // count, boundaries[-1])
+                f.seek(position)
+                # Move the boundary after the next separator, reading a little at a time
+                while position < size:
+                    block = f.read(4096)
+                    separators = [block.find(separator) for separator in (b' ', b'\n')
+                                  if separator in block]
+                    if separators:
+                        position += min(separators) + 1
+                        break
+                    position += len(block)
+                if position < size:
+                    boundaries.append(position)
+        boundaries.append(size)
+        return list(zip(boundaries[:-1], boundaries[1:]))
+
+    def iter_names(self, file):
+        """
+        Yield the names of the file one at a time, reading it one chunk at a time.
+
+        Parameters
+        ----------
+        file: object
+              A file containing plain text sample data of names.
+        """
+        name_splitter = NameSplitter()
+        for chunk in self.iter_chunks(file):
+            yield from name_splitter.update(chunk)
+        yield from name_splitter.flush()
+
+    @staticmethod
+    def _normalize(chunk):
+        """
+        Read line breaks as spaces and lowercase the chunk.
+        """
+        return chunk.replace('\r', '').replace('\n', ' ').lower()
+
+class NameSplitter:
+    """
+    Splits data fed one chunk at a time into names, names spanning two chunks being returned
+    whole once the next chunk is fed.
+    """
+
+    _partial_name = None
+
+    def __init__(self):
+        self._partial_name = ''
+
+    def update(self, chunk):
+        """
+        Return the names ending in the next chunk of data.
+
+        Parameters
+        ----------
+        chunk: string
+               The characters following the previous chunk.
+        """
+        names = (self._partial_name + chunk).split(' ')
+        # The last name may continue in the next chunk
+        self._partial_name = names.pop()
+        return [name for name in names if name]
+
+    def flush(self):
+        """
+        Return the last name of the data, assuming the data ends there.
+        """
+        partial_name, self._partial_name = self._partial_name, ''
+        return [partial_name] if partial_name else []
@@ -0,0 +1,43 @@
+"""Utility module to sort more strings than fit in memory."""
+
+import heapq
+import tempfile
+from itertools import islice
+
+def external_sort(strings, run_size=1000000):
+    """
+    Lazily yield strings in sorted order, holding at most run_size of them in memory. When
+    there are more strings, they are sorted a run at a time into temporary files, and the
+    sorted runs are merged as they are read back.
+
+    Parameters
+    ----------
+    strings: iterable
+             The strings to sort, which must not contain line breaks.
+    run_size: int
+              The number of strings sorted in memory at a time.
+    """
+    strings = iter(strings)
+    run = sorted(islice(strings, run_size))
+    if len(run) < run_size:
+        yield from run
+        return
+    run_files = list()
+    try:
+        while run:
+            run_file = tempfile.TemporaryFile('w+', encoding='utf-8')
+            run_files.append(run_file)
+            run_file.writelines(string + '\n' for string in run)
+            run_file.seek(0)
+            run = sorted(islice(strings, run_size))
+        yield from heapq.merge(*(_read_run(run_file) for run_file in run_files))
+    finally:
+        for run_file in run_files:
+            run_file.close()
+
+def _read_run(run_file):
+    """
+    Yield the strings of a sorted run, one per line.
+    """
+    for line in run_file:
+        yield line[:-1]
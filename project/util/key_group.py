@@ -0,0 +1,13 @@
+"""Utility module for key groups."""
+
+def key_group(key):
+    """
+    Return the group a key of a probability table belongs to. Probabilities are relative to the
+    other keys of the same group: keys are grouped by all their letters but the last one, except
+    the keys ending with a space which are grouped apart by all their letters but the last two.
+    A group is the tuple of those letters (the context of the keys) and whether the keys end with
+    a space.
+    """
+    if key[-1] == ' ':
+        return (key[:-2], True)
+    return (key[:-1], False)
@@ -0,0 +1,209 @@
+"""Utility module to cache trained models next to their sample data."""
+
+import glob
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from project.compact_transition_index import ARRAYS, CompactTransitionIndex
+from project.util.compact_mappings import CompactCounts
+
+# Bump whenever the way tables are built changes, so that stale compiled models are retrained
+MODEL_VERSION = 5
+MAGIC = b'RNGM'
+# Magic bytes, model version and size of the JSON header
+PREAMBLE = struct.Struct('<4sII')
+EXTENSION = '.rngm'
+ALIGNMENT = 8
+
+class ModelCache:
+    """
+    Stores the transition indexes and occurrences of trained probability tables in a compact
+    binary file next to the sample data they were trained on. The file name holds the model
+    version and a hash of the sample data, so a cached model is only used while both are
+    unchanged.
+
+    A compiled model file starts with the magic bytes, the model version and the size of a JSON
+    header describing every table it contains, followed by the arrays of each table aligned on
+    8 bytes. For each transition index of a table: the arrays of its CompactTransitionIndex.
+    Then the code points of the sorted keys of the table, the offsets where each key starts and
+    the number of occurrences of each key. Tables are read straight from the memory-mapped file
+    as compact indexes and counts, and processes loading the same model share its memory.
+    """
+
+    @staticmethod
+    def create_digest():
+        """
+        Return a new hash object for the sample data, to pass to path.
+        """
+        return hashlib.sha256()
+
+    def exists(self, file, model_name):
+        """
+        Return whether there is a compiled model of a sample data file for any version of the
+        file, without reading the file. When there is none, the file does not have to be hashed
+        before it is read for training.
+
+        Parameters
+        ----------
+        file: string
+              Path to the file containing the sample data.
+        model_name: string
+                    Name of the kind of model.
+        """
+        pattern = '%s.%s.v*%s' % (glob.escape(file), model_name, EXTENSION)
+        return bool(glob.glob(pattern))
+
+    def path(self, file, model_name, digest=None):
+        """
+        Return the path of the compiled model of a sample data file.
+
+        Parameters
+        ----------
+        file: string
+              Path to the file containing the sample data.
+        model_name: string
+                    Name of the kind of model, to keep different models of the same sample data.
+        digest: object
+                A hash object from create_digest already updated with the whole file, to avoid
+                reading the file again. The file is hashed if None.
+        """
+        if digest is None:
+            digest = self.create_digest()
+            with open(file, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        return '%s.%s.v%d-%s%s' % (file, model_name, MODEL_VERSION, digest.hexdigest()[:16],
+                                   EXTENSION)
+
+    def load(self, model_file):
+        """
+        Return the tables stored in a compiled model file as a dictionary of table name to
+        compact transition indexes and occurrences, or None when there is no usable compiled
+        model.
+
+        Parameters
+        ----------
+        model_file: string
+                    Path to the compiled model, as returned by path.
+        """
+        try:
+            with open(model_file, 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(buffer) < PREAMBLE.size:
+            return None
+        magic, version, header_size = PREAMBLE.unpack_from(buffer)
+        if magic != MAGIC or version != MODEL_VERSION:
+            return None
+        header = json.loads(bytes(buffer[PREAMBLE.size:PREAMBLE.size + header_size]))
+
+        data = memoryview(buffer)
+        position = self._align(PREAMBLE.size + header_size)
+        tables = dict()
+        for table_name, table_header in header['tables'].items():
+            indexes = dict()
+            for index_name, index_header in table_header['indexes'].items():
+                nodes = index_header['nodes']
+                successor_count = index_header['successors']
+                lengths = (nodes + 1, nodes - 1, nodes + 1, successor_count, successor_count)
+                arrays = list()
+                positions = list()
+                for (_, typecode), length in zip(ARRAYS, lengths):
+                    values, next_position = self._read(data, position, typecode, length)
+                    arrays.append(values)
+                    positions.append((position, values.nbytes))
+                    position = next_position
+                indexes[index_name] = CompactTransitionIndex(arrays, (model_file, positions))
+
+            occurrences_header = table_header['occurrences']
+            key_count = occurrences_header['keys']
+            code_points, position = self._read(data, position, 'I',
+                                               occurrences_header['key_letters'])
+            offsets, position = self._read(data, position, 'I', key_count + 1)
+            counts, position = self._read(data, position, 'Q', key_count)
+            tables[table_name] = (indexes, CompactCounts(code_points, offsets, counts))
+        return tables
+
+    def save(self, model_file, tables):
+        """
+        Write tables to a compiled model file and remove the stale compiled models of the same
+        sample data.
+
+        Parameters
+        ----------
+        model_file: string
+                    Path to the compiled model, as returned by path.
+        tables: dict
+                Dictionary of table name to loaded CumulativeProbabilityTable.
+        """
+        header = {'tables': dict()}
+        arrays = list()
+        for table_name, table in tables.items():
+            table_header = {'indexes': dict()}
+            for index_name, index in table.indexes.items():
+                if not isinstance(index, CompactTransitionIndex):
+                    index = CompactTransitionIndex.from_index(index)
+                index_arrays = index.arrays()
+                arrays.extend(array(typecode, values)
+                              for ((_, typecode), values) in zip(ARRAYS, index_arrays))
+                table_header['indexes'][index_name] = {
+                    'nodes': len(index_arrays[0]) - 1,
+                    'successors': len(index_arrays[3]),
+                }
+            occurrences = table.occurrences
+            if not isinstance(occurrences, CompactCounts):
+                occurrences = CompactCounts.from_dict(occurrences)
+            arrays.extend(array(typecode, values) for (typecode, values)
+                          in zip('IIQ', occurrences.arrays()))
+            table_header['occurrences'] = {
+                'keys': len(occurrences),
+                'key_letters': len(occurrences.arrays()[0]),
+            }
+            header['tables'][table_name] = table_header
+        encoded_header = json.dumps(header).encode('utf-8')
+
+        # Every writer has its own temporary file, even threads of the same process
+        descriptor, temporary_file = tempfile.mkstemp(
+            '.tmp', os.path.basename(model_file) + '.', os.path.dirname(model_file) or '.')
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                f.write(PREAMBLE.pack(MAGIC, MODEL_VERSION, len(encoded_header)))
+                f.write(encoded_header)
+                for values in arrays:
+                    f.write(b'\0' * (self._align(f.tell()) - f.tell()))
+                    values.tofile(f)
+            os.replace(temporary_file, model_file)
+        except BaseException:
+            os.remove(temporary_file)
+            raise
+
+        # Compiled models of previous versions of the sample data are not needed anymore
+        model_prefix = model_file[:model_file.rindex('.v')]
+        for stale_file in glob.glob(glob.escape(model_prefix) + '.v*' + EXTENSION):
+            if stale_file != model_file:
+                try:
+                    os.remove(stale_file)
+                except FileNotFoundError:
+                    # Removed by another writer in the meantime
+                    pass
+
+    @staticmethod
+    def _align(position):
+        """
+        Return the first position aligned on ALIGNMENT bytes at or after position.
+        """
+        return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+    def _read(self, data, position, typecode, count):
+        """
+        Return a view of count values of the given type starting at the aligned position, along
+        with the aligned position following them.
+        """
+        size = array(typecode).itemsize * count
+        values = data[position:position + size].cast(typecode)
+        return values, self._align(position + size)
@@ -0,0 +1,107 @@
+"""Utility module to write generated names to a file in bulk."""
+
+import csv
+import io
+import json
+
+class NameWriter:
+    """
+    Writes names to a text file in one of several formats. Names are formatted a batch at a
+    time and every batch is written with a single call, so that writing millions of names is
+    not dominated by the cost of writing them one at a time.
+    """
+
+    batch_size = 8192
+    _file = None
+
+    def __init__(self, file):
+        """
+        Parameters
+        ----------
+        file: object
+              The text file to write the names to.
+        """
+        self._file = file
+
+    def write(self, names):
+        """
+        Write names as they are produced and return the number of names written. The names
+        produced before an error are still written.
+
+        Parameters
+        ----------
+        names: iterable
+               The names to write.
+        """
+        self._file.write(self._format_header())
+        batch = list()
+        written = 0
+        try:
+            for name in names:
+                batch.append(name)
+                if len(batch) == self.batch_size:
+                    self._file.write(self._format(batch))
+                    written += len(batch)
+                    batch.clear()
+        finally:
+            if batch:
+                self._file.write(self._format(batch))
+                written += len(batch)
+        return written
+
+    def _format_header(self):
+        """
+        Return the text written before the names.
+        """
+        return ''
+
+    def _format(self, names):
+        """
+        Return the text of a batch of names.
+        """
+        raise NotImplementedError
+
+class PlainNameWriter(NameWriter):
+    """
+    Writes one name per line.
+    """
+
+    def _format(self, names):
+        return '\n'.join(names) + '\n'
+
+class JsonLinesNameWriter(NameWriter):
+    """
+    Writes every name as a JSON string on its own line.
+    """
+
+    def _format(self, names):
+        return ''.join([json.dumps(name, ensure_ascii=False) + '\n' for name in names])
+
+class CsvNameWriter(NameWriter):
+    """
+    Writes the names as a CSV file with a single 'name' column.
+    """
+
+    _buffer = None
+    _writer = None
+
+    def __init__(self, file):
+        super().__init__(file)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator='\n')
+
+    def _format_header(self):
+        return 'name\n'
+
+    def _format(self, names):
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._writer.writerows([name] for name in names)
+        return self._buffer.getvalue()
+
+# Name writers by output format
+FORMATS = {
+    'plain': PlainNameWriter,
+    'jsonl': JsonLinesNameWriter,
+    'csv': CsvNameWriter,
+}
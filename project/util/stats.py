@@ -0,0 +1,90 @@
+"""Utility module to collect statistics about training and generating names."""
+
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+class Stats:
+    """
+    Collects counts of events and the time spent in phases. Objects collecting statistics
+    hold a Stats in their stats attribute, which is None when statistics are disabled so that
+    the only cost left is checking that attribute.
+    """
+
+    counters = None
+    timings = None
+
+    def __init__(self):
+        self.counters = Counter()
+        self.timings = defaultdict(float)
+
+    def count(self, event, amount=1):
+        """
+        Count an event.
+
+        Parameters
+        ----------
+        event: string
+               Name of the event.
+        amount: int
+                Number of times the event happened.
+        """
+        self.counters[event] += amount
+
+    def merge(self, other):
+        """
+        Add the counters and the timings of other statistics to these ones.
+
+        Parameters
+        ----------
+        other: Stats
+               The statistics to add.
+        """
+        self.counters.update(other.counters)
+        for phase, seconds in other.timings.items():
+            self.timings[phase] += seconds
+
+    @contextmanager
+    def timer(self, phase):
+        """
+        Return a context manager adding the time spent inside it to a phase.
+
+        Parameters
+        ----------
+        phase: string
+               Name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[phase] += time.perf_counter() - start
+
+    def report(self):
+        """
+        Return the counters and the timings in seconds collected so far, as a dictionary.
+        """
+        return {'counters': dict(sorted(self.counters.items())),
+                'timings': dict(self.timings)}
+
+    def format(self):
+        """
+        Return the counters and the timings collected so far as readable text.
+        """
+        lines = ['%s: %d' % (event, count) for (event, count) in sorted(self.counters.items())]
+        lines.extend('%s: %.3f ms' % (phase, seconds * 1000)
+                     for (phase, seconds) in self.timings.items())
+        return '\n'.join(lines)
+
+def timed(stats, phase):
+    """
+    Return a context manager timing a phase when stats is not None, doing nothing otherwise.
+
+    Parameters
+    ----------
+    stats: Stats
+           The statistics to update, or None when statistics are disabled.
+    phase: string
+           Name of the phase.
+    """
+    return stats.timer(phase) if stats is not None else nullcontext()
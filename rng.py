@@ -1,7 +1,14 @@
 """Main entrypoint."""
 
 import argparse
+import sys
+from contextlib import nullcontext
+from project.name_filter import NameSpaceExhaustedError
+from project.parallel_name_generator import ParallelNameGenerator
 from project.random_name_generator import RandomNameGenerator
+from project.util.external_sort import external_sort
+from project.util.name_writer import FORMATS
+from project.util.stats import Stats, timed
 
 PARSER = argparse.ArgumentParser(description='Random Name Generator')
 PARSER.add_argument('numgen', type=int, nargs='?',
@@ -10,6 +17,45 @@ PARSER.add_argument('-f', '--file',
                     help='The file containing plain text sample data of names.')
 PARSER.add_argument('-m', '--max-length', type=int, nargs='?', const=7,
                     help='Specifies a maximum length for generated names.')
+PARSER.add_argument('--min-length', type=int,
+                    help='Specifies a minimum length for generated names.')
+PARSER.add_argument('--prefix',
+                    help='The letters every generated name starts with.')
+PARSER.add_argument('--suffix',
+                    help='The letters every generated name ends with.')
+PARSER.add_argument('-o', '--order', type=int,
+                    help='The number of previous letters used to predict the next letter. '
+                         'Defaults to 2.')
+PARSER.add_argument('-j', '--jobs', type=int,
+                    help='The number of processes used to train the model and generate the '
+                         'names. Defaults to 1.')
+PARSER.add_argument('--seed', type=int,
+                    help='Seed of the random number generator. The same seed and number of '
+                         'processes always generate the same names.')
+PARSER.add_argument('-s', '--sort', action='store_true',
+                    help='Sort the generated names before writing them. Names that do not fit '
+                         'in memory are sorted through temporary files.')
+PARSER.add_argument('--output',
+                    help='The file to write the names to. Defaults to the standard output.')
+PARSER.add_argument('--format', choices=sorted(FORMATS), default='plain',
+                    help='The format of the names written: one per line, JSON Lines or CSV. '
+                         'Defaults to plain.')
+PARSER.add_argument('-u', '--unique', action='store_true',
+                    help='Never generate the same name twice.')
+PARSER.add_argument('-n', '--novel', action='store_true',
+                    help='Never generate a name of the sample data.')
+PARSER.add_argument('--stats', action='store_true',
+                    help='Print statistics about loading the model and generating the names '
+                         'after the names.')
+PARSER.add_argument('-c', '--compact', action='store_true',
+                    help='Keep the model in flat arrays, taking several times less memory and '
+                         'shared between processes, at the cost of slower generation.')
+PARSER.add_argument('--no-cache', action='store_true',
+                    help='Always train the model from the sample data instead of loading the '
+                         'compiled model stored next to it.')
+PARSER.add_argument('-b', '--backend', choices=('python', 'numpy'), default='python',
+                    help='The engine generating the names. The numpy backend generates names '
+                         'in large vectorized batches. Defaults to python.')
 
 def main():
     """
@@ -19,23 +65,59 @@ def main():
     args = PARSER.parse_args()
     if args.numgen is None:
         args.numgen = 10
+    # Open the output before spending time on training the model
+    if args.output is None:
+        output = nullcontext(sys.stdout)
+    else:
+        try:
+            output = open(args.output, 'w', encoding='utf-8', buffering=1 << 20)
+        except OSError as error:
+            PARSER.error('cannot write to %s: %s' % (args.output, error.strerror))
     # Initialize generator
     params = {
         'file': args.file,
-        'max_length': args.max_length
+        'min_length': args.min_length,
+        'max_length': args.max_length,
+        'prefix': args.prefix,
+        'suffix': args.suffix,
+        'order': args.order,
+        'processes': args.jobs,
+        'cache': not args.no_cache,
+        'novel': args.novel,
+        'compact': args.compact,
+        'seed': args.seed,
+        'stats': Stats() if args.stats else None
     }
-    generator = RandomNameGenerator(params)
-    # Generate random names
-    print("Generating %d names...\n" % (args.numgen))
-    for _ in range(args.numgen):
-        generator.generate()
-    #TEST
-    #generator.generated_names = ["Aesos","Apollo","Argus","Aura","Chara", "Chron", "Dio","Gaioxia","Hypea","Hyperselo","Kratos","Medusa", "Ouryne","Ouralo","Palanomes","Peritras","Talasa","Targia","Urus","Zeus"]
-    #generator.generated_names = ["Anzu", "Asuki","Chiyo","Futaba","Hina","Ichikao","Kyouko","Makoto","Rien","Tsubaki"]
-    # Sort and print list of generated names
-    generator.generated_names.sort()
-    for _ in range(len(generator.generated_names)):
-        print(generator.generated_names[_])
+    try:
+        generator = RandomNameGenerator(params)
+    except ValueError as error:
+        PARSER.error(str(error))
+    if args.backend == 'numpy':
+        # Only import the batch backend when needed, importing NumPy slows down startup
+        from project.batch_name_generator import BatchNameGenerator
+        try:
+            generator = BatchNameGenerator(generator, args.seed)
+        except ImportError:
+            print('NumPy is not installed, falling back to the python backend.', file=sys.stderr)
+        except ValueError as error:
+            print('%s, falling back to the python backend.' % error, file=sys.stderr)
+    if args.jobs is not None and args.jobs > 1:
+        generator = ParallelNameGenerator(generator, args.jobs, args.seed)
+    # Generate random names, writing them as they are generated unless they have to be sorted
+    # The message is not mixed with structured names on the standard output
+    message_file = sys.stderr if args.output is None and args.format != 'plain' else sys.stdout
+    print("Generating %d names...\n" % (args.numgen), file=message_file)
+    names = generator.iter_names(args.numgen, args.unique, args.novel)
+    try:
+        with timed(params['stats'], 'generate'), output as output_file:
+            if args.sort:
+                names = external_sort(names)
+            FORMATS[args.format](output_file).write(names)
+    except NameSpaceExhaustedError as error:
+        PARSER.exit(1, '%s: %s\n' % (PARSER.prog, error))
+    finally:
+        if args.stats:
+            print('\n' + params['stats'].format(), file=sys.stderr)
 
 # Identify this module as main
 if __name__ == "__main__":
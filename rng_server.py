@@ -0,0 +1,40 @@
+"""Entrypoint of the name generation server."""
+
+import argparse
+import asyncio
+from project.name_server import NameServer
+
+PARSER = argparse.ArgumentParser(description='Random Name Generator server')
+PARSER.add_argument('--host', default='127.0.0.1',
+                    help='The address to listen on. Defaults to 127.0.0.1.')
+PARSER.add_argument('-p', '--port', type=int, default=8765,
+                    help='The TCP port to listen on. Defaults to 8765.')
+PARSER.add_argument('-u', '--unix-socket',
+                    help='Listen on this Unix socket instead of a TCP port.')
+PARSER.add_argument('--max-models', type=int, default=8,
+                    help='The maximum number of trained models kept in memory. Defaults to 8.')
+PARSER.add_argument('-c', '--compact', action='store_true',
+                    help='Keep the models in flat arrays, taking several times less memory at '
+                         'the cost of slower generation.')
+PARSER.add_argument('--no-cache', action='store_true',
+                    help='Always train the models from the sample data instead of loading the '
+                         'compiled models stored next to it.')
+
+def main():
+    """
+    Initialize and run the name generation server.
+    """
+    args = PARSER.parse_args()
+    server = NameServer(args.max_models, not args.no_cache, args.compact)
+    if args.unix_socket is not None:
+        serving = server.serve_unix(args.unix_socket)
+    else:
+        serving = server.serve_tcp(args.host, args.port)
+    try:
+        asyncio.run(serving)
+    except KeyboardInterrupt:
+        pass
+
+# Identify this module as main
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""Tests of NameFilter."""
+
+import itertools
+import unittest
+from project.name_filter import NameFilter, NameSpaceExhaustedError
+
+class NameFilterTest(unittest.TestCase):
+
+    def test_novel_exhausted(self):
+        name_filter = NameFilter(False, {'zeus'})
+        with self.assertRaises(NameSpaceExhaustedError):
+            list(name_filter.apply(itertools.repeat('Zeus'), 3))
+
+    def test_novel_unique_exhausted(self):
+        name_filter = NameFilter(True, {'zeus'})
+        names = itertools.cycle(['Zeus', 'Hera'])
+        with self.assertRaises(NameSpaceExhaustedError):
+            list(name_filter.apply(names, 3))
+
+    def test_novel_unique_names(self):
+        name_filter = NameFilter(True, {'zeus'})
+        names = ['Zeus', 'Hera', 'Hera', 'Ares', 'zeus']
+        self.assertEqual(list(name_filter.apply(iter(names), 2)), ['Hera', 'Ares'])
+
+if __name__ == '__main__':
+    unittest.main()
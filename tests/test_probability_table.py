@@ -0,0 +1,160 @@
+"""Tests of the probability tables built from sample data."""
+
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+from project.cumulative_probability_table import CumulativeProbabilityTable
+from project.ngram_cumulative_strategy import NGramCumulativeStrategy
+from project.ngram_length_strategy import NGramLengthStrategy
+from project.random_name_generator import RandomNameGenerator
+from project.util.data_loader import ChunkedFileDataLoader
+from project.util.key_group import key_group
+from project.util.model_cache import EXTENSION, MODEL_VERSION, ModelCache
+
+DATA_FILE = 'media/greek_gods.txt'
+
+def load_table(order, processes=1, chunk_size=1 << 20):
+    """
+    Train and return a table of the given order from the Greek gods.
+    """
+    table = CumulativeProbabilityTable(NGramLengthStrategy(order), NGramCumulativeStrategy(),
+                                       ChunkedFileDataLoader(chunk_size))
+    table.load(DATA_FILE, processes)
+    return table
+
+def table_contents(table):
+    """
+    Return the occurrences, frequencies and transition indexes of a table as plain dictionaries.
+    """
+    indexes = {name: {context: (''.join(successors), list(cumulative_values))
+                      for (context, (successors, cumulative_values)) in index.items()}
+               for (name, index) in table.indexes.items()}
+    return dict(table.occurrences), dict(table.frequencies), indexes
+
+class FrequenciesTest(unittest.TestCase):
+
+    def test_frequencies_match_group_totals(self):
+        for order in (2, 3):
+            strategy = NGramLengthStrategy(order)
+            occurrences = strategy.count_occurrences(ChunkedFileDataLoader().load(DATA_FILE))
+            frequencies = strategy.normalize(occurrences)
+            self.assertEqual(set(frequencies), set(occurrences))
+            for key, value in occurrences.items():
+                total = sum(other_value for (other_key, other_value) in occurrences.items()
+                            if key_group(other_key) == key_group(key))
+                self.assertAlmostEqual(frequencies[key], value / total)
+
+    def test_cumulative_values_end_at_one(self):
+        for order in (2, 3):
+            for index in load_table(order).indexes.values():
+                for _, (successors, cumulative_values) in index.items():
+                    self.assertEqual(len(successors), len(cumulative_values))
+                    self.assertEqual(list(cumulative_values), sorted(cumulative_values))
+                    self.assertAlmostEqual(cumulative_values[-1], 1.0)
+
+class ShardedLoadingTest(unittest.TestCase):
+
+    def test_small_chunks(self):
+        for order in (2, 3):
+            expected = table_contents(load_table(order))
+            for chunk_size in (1, 7, 64):
+                self.assertEqual(table_contents(load_table(order, chunk_size=chunk_size)),
+                                 expected)
+
+    def test_processes(self):
+        for order in (2, 3):
+            expected = table_contents(load_table(order, 1, 64))
+            # Chunks are small enough for the sample data to be split into several shards
+            self.assertGreater(len(ChunkedFileDataLoader(64).split(DATA_FILE, 4)), 1)
+            self.assertEqual(table_contents(load_table(order, 4, 64)), expected)
+
+class IncrementalUpdateTest(unittest.TestCase):
+
+    names = ['Zorgon', 'Xylia', 'Hera', 'Quetzal', 'Ab']
+
+    def test_add_matches_training(self):
+        with tempfile.TemporaryDirectory() as directory:
+            data_file = os.path.join(directory, 'names.txt')
+            with open(DATA_FILE, encoding='utf-8') as f:
+                data = f.read()
+            with open(data_file, 'w', encoding='utf-8') as f:
+                # The names follow the sample data after a single space, and end like it
+                f.write(data.rstrip() + ' ' + ' '.join(self.names) + ' \n')
+            for order in (2, 3):
+                expected = CumulativeProbabilityTable(
+                    NGramLengthStrategy(order), NGramCumulativeStrategy(), ChunkedFileDataLoader())
+                expected.load(data_file)
+                for compact in (False, True):
+                    table = load_table(order)
+                    if compact:
+                        table.compact()
+                    table.add_names(self.names)
+                    self.assertEqual(table_contents(table), table_contents(expected))
+
+    def test_add_then_remove(self):
+        for order in (2, 3):
+            expected = table_contents(load_table(order))
+            table = load_table(order)
+            table.add_names(self.names)
+            table.remove_names(self.names)
+            self.assertEqual(table_contents(table), expected)
+
+    def test_remove_unknown_names(self):
+        table = load_table(2)
+        with self.assertRaises(ValueError):
+            table.remove_names(['Zorgon'])
+
+class CompactTableTest(unittest.TestCase):
+
+    def test_compact_and_expand(self):
+        for order in (2, 3):
+            table = load_table(order)
+            expected = table_contents(table)
+            table.compact()
+            self.assertTrue(table.is_compact())
+            self.assertEqual(table_contents(table), expected)
+            table.expand()
+            self.assertFalse(table.is_compact())
+            self.assertEqual(table_contents(table), expected)
+
+    def test_cache_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for order in (2, 3):
+                table = load_table(order)
+                model_file = os.path.join(directory, 'greek_gods.ngram%d.v%d-test%s'
+                                          % (order, MODEL_VERSION, EXTENSION))
+                ModelCache().save(model_file, {'ngram': table})
+                restored = load_table(order)
+                restored.restore(*ModelCache().load(model_file)['ngram'])
+                self.assertEqual(table_contents(restored), table_contents(table))
+                # Drop the memory-mapped arrays before the file is removed
+                del restored
+
+class GeneratorFormsTest(unittest.TestCase):
+
+    def setUp(self):
+        # Compiled models are written next to the sample data, in a copy of it
+        self._directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self._directory, 'media'))
+        shutil.copy(DATA_FILE, os.path.join(self._directory, DATA_FILE))
+        self._cwd = os.getcwd()
+        os.chdir(self._directory)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        shutil.rmtree(self._directory)
+
+    def test_same_names(self):
+        for order in (2, 3):
+            params = {'order': order, 'seed': 7}
+            expected = RandomNameGenerator(dict(params, cache=False)).generate_many(200)
+            for form in ({'cache': False, 'compact': True}, {'cache': True},
+                         {'cache': True, 'compact': True}):
+                self.assertEqual(RandomNameGenerator(dict(params, **form)).generate_many(200),
+                                 expected)
+            self.assertEqual(len(glob.glob('media/*.ngram%d.*%s' % (order, EXTENSION))), 1)
+
+if __name__ == '__main__':
+    unittest.main()
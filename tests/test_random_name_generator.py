@@ -0,0 +1,64 @@
+"""Tests of RandomNameGenerator."""
+
+import unittest
+from project.random_name_generator import RandomNameGenerator
+
+class KnownNamesTest(unittest.TestCase):
+
+    def test_added_names_known_when_read_lazily(self):
+        generator = RandomNameGenerator({'cache': False})
+        generator.add_names(['Qwertyuiop'])
+        self.assertIn('qwertyuiop', generator.known_names())
+        self.assertIn('zeus', generator.known_names())
+
+    def test_added_names_known_when_read_at_start(self):
+        generator = RandomNameGenerator({'cache': False, 'novel': True})
+        generator.add_names(['Qwertyuiop'])
+        self.assertIn('qwertyuiop', generator.known_names())
+
+    def test_removed_names_still_known_when_read_lazily(self):
+        generator = RandomNameGenerator({'cache': False})
+        generator.add_names(['Qwertyuiop'])
+        generator.remove_names(['Qwertyuiop'])
+        self.assertIn('qwertyuiop', generator.known_names())
+
+class ConstraintsTest(unittest.TestCase):
+
+    def test_names_follow_constraints(self):
+        constraints = (
+            {'min_length': 8, 'max_length': 10},
+            {'max_length': 5},
+            {'prefix': 'Ka', 'suffix': 'ra', 'max_length': 7},
+            {'suffix': 'us', 'min_length': 40},
+            {'prefix': 'zeu', 'order': 3},
+        )
+        for params in constraints:
+            generator = RandomNameGenerator(dict(params, cache=False, seed=3))
+            self.assertTrue(generator.is_constrained())
+            for name in generator.generate_many(300):
+                self.assertGreaterEqual(len(name), params.get('min_length', 1))
+                self.assertLessEqual(len(name), params.get('max_length', len(name)))
+                self.assertTrue(name.lower().startswith(params.get('prefix', '').lower()))
+                self.assertTrue(name.lower().endswith(params.get('suffix', '')))
+
+    def test_lengths_within_bounds_are_all_drawn(self):
+        generator = RandomNameGenerator({'cache': False, 'seed': 3, 'min_length': 8,
+                                         'max_length': 10})
+        lengths = [len(name) for name in generator.generate_many(600)]
+        for length in (8, 9, 10):
+            self.assertGreater(lengths.count(length), 100)
+
+    def test_impossible_constraints(self):
+        for params in ({'min_length': 9, 'max_length': 3},
+                       {'prefix': 'abc', 'suffix': 'def', 'max_length': 5}):
+            with self.assertRaises(ValueError):
+                RandomNameGenerator(dict(params, cache=False))
+        # Constraints are checked before the sample data is read
+        with self.assertRaises(ValueError):
+            RandomNameGenerator({'file': 'missing', 'min_length': 9, 'max_length': 3})
+
+    def test_unconstrained(self):
+        self.assertFalse(RandomNameGenerator({'cache': False}).is_constrained())
+
+if __name__ == '__main__':
+    unittest.main()